@@ -0,0 +1,354 @@
+#
+# Two-way lookup tables for the pattern in dictcomps.py, where country_code
+# and its reverse map are each built by their own pass over DIAL_CODES.
+#
+# BiMap keeps both directions of a one-to-one mapping in step, filling them
+# in a single pass over the pairs. freeze() turns it into a FrozenBiMap that
+# keeps the two dicts read-only and sorts the keys for range() only when it
+# is first called. freeze(compact=True) keeps keys and values in two tuples
+# sorted by key plus a minimal perfect hash (hash and displace) kept in
+# array('i') tables: no empty dict slots are carried around, about half the
+# memory, but a lookup costs two hash() calls in Python code, several times
+# a dict lookup. where() and FrozenBiMap.range() give filtered views that are
+# computed on access instead of being materialized into new dicts.
+
+import bisect
+import collections.abc
+import itertools
+from array import array
+
+# Hashes are reduced mod this prime before mod the table size, so that keys
+# whose hashes agree in their low bits still spread over a power-of-two table
+PRIME = 2 ** 61 - 1
+
+
+class FilteredView(collections.abc.Mapping):
+    """
+    Read-only view of the (key, value) pairs of a mapping for which
+    predicate(key, value) is true, evaluated on every access
+    """
+
+    def __init__(self, mapping, predicate):
+        self._mapping = mapping
+        self._predicate = predicate
+
+    def __getitem__(self, key):
+        value = self._mapping[key]
+        if not self._predicate(key, value):
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        return (key for key, value in self._mapping.items() if self._predicate(key, value))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    @property
+    def inverse(self):
+        predicate = self._predicate
+        return FilteredView(self._mapping.inverse, lambda value, key: predicate(key, value))
+
+    def __repr__(self):
+        return f'{type(self).__name__}({dict(self.items())!r})'
+
+
+class BiMap(collections.abc.MutableMapping):
+    """
+    One-to-one mapping with an always up to date inverse: bimap.inverse[value]
+    is the key of value. Mapping a second key to a value raises ValueError
+    """
+
+    def __init__(self, pairs=(), **kwargs):
+        self._forward = {}
+        self._backward = {}
+        self._inverse = None
+        self.update(pairs, **kwargs)
+
+    @property
+    def inverse(self):
+        if self._inverse is None:
+            inverse = type(self).__new__(type(self))
+            inverse._forward, inverse._backward = self._backward, self._forward
+            inverse._inverse = self
+            self._inverse = inverse
+        return self._inverse
+
+    def __getitem__(self, key):
+        return self._forward[key]
+
+    def __setitem__(self, key, value):
+        forward, backward = self._forward, self._backward
+        if value in backward:
+            if backward[value] == key:
+                return
+            raise ValueError(f'{value!r} is already mapped from {backward[value]!r}')
+        if key in forward:
+            del backward[forward[key]]
+        forward[key] = value
+        backward[value] = key
+
+    def __delitem__(self, key):
+        del self._backward[self._forward.pop(key)]
+
+    def __iter__(self):
+        return iter(self._forward)
+
+    def __len__(self):
+        return len(self._forward)
+
+    def __contains__(self, key):
+        return key in self._forward
+
+    def where(self, predicate):
+        return FilteredView(self, predicate)
+
+    def freeze(self, compact=False):
+        return FrozenBiMap(self._forward.items(), compact)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self._forward!r})'
+
+
+def _perfect_hash(keys):
+    """
+    Hash and displace: keys go into len(keys) buckets by hash(key); every
+    bucket, biggest first, gets the smallest seed d that sends its keys to
+    free slots by hash((d, key)); single keys take a free slot directly
+    (stored as -slot - 1). Returns (seeds, positions) with positions[slot]
+    the index in keys, or None when two keys share a hash and cannot be split
+    """
+    n = len(keys)
+    buckets = [[] for _ in range(n)]
+    for pos, key in enumerate(keys):
+        buckets[hash(key) % PRIME % n].append(pos)
+    seeds = array('i', [0]) * n
+    positions = array('I', [0]) * n
+    taken = bytearray(n)
+    order = sorted(range(n), key=lambda b: len(buckets[b]), reverse=True)
+    singles = 0
+    for singles, b in enumerate(order):
+        bucket = buckets[b]
+        if len(bucket) <= 1:
+            break
+        if len({hash(keys[pos]) for pos in bucket}) < len(bucket):
+            return None
+        for d in itertools.count(1):
+            slots = [hash((d, keys[pos])) % PRIME % n for pos in bucket]
+            if len(set(slots)) == len(slots) and not any(taken[s] for s in slots):
+                break
+        for pos, slot in zip(bucket, slots):
+            taken[slot] = 1
+            positions[slot] = pos
+        seeds[b] = d
+    else:
+        return seeds, positions
+    free = (slot for slot in range(n) if not taken[slot])
+    for b in order[singles:]:
+        if not buckets[b]:
+            break
+        slot = next(free)
+        positions[slot] = buckets[b][0]
+        seeds[b] = -slot - 1
+    return seeds, positions
+
+
+class FrozenBiMap(collections.abc.Mapping):
+    """
+    Immutable BiMap. By default it keeps a forward and a backward dict, so a
+    lookup costs what a BiMap lookup does, and sorts the keys range() bisects
+    on the first time range() is called. compact=True keeps key and value
+    tuples sorted by key and a minimal perfect hash instead: about half the
+    memory of the two dicts, but two hash() calls in Python code per lookup,
+    some three times slower (keys whose hashes collide exactly fall back to a
+    dict of positions). The dict form iterates in insertion order, the
+    compact one in key order when the keys can be ordered
+    """
+    _forward = _backward = None
+    _keys = _values = None
+    _index = _seeds = _positions = None
+    _inverse = None
+    _ordered = True
+
+    def __init__(self, pairs=(), compact=False):
+        pairs = list(pairs.items() if hasattr(pairs, 'items') else pairs)
+        self._compact = compact
+        if not compact:
+            self._forward = dict(pairs)
+            self._backward = {value: key for key, value in pairs}
+            if not len(self._forward) == len(self._backward) == len(pairs):
+                raise ValueError(f'{type(self).__name__} needs unique keys and unique values')
+            return
+        try:
+            # sorted() leaves pairs in insertion order if a comparison fails
+            pairs = sorted(pairs, key=lambda pair: pair[0])
+        except TypeError:
+            self._ordered = False
+        self._keys = tuple(key for key, _ in pairs)
+        self._values = tuple(value for _, value in pairs)
+        if len(set(self._values)) != len(self._values) or len(set(self._keys)) != len(self._keys):
+            raise ValueError(f'{type(self).__name__} needs unique keys and unique values')
+        table = _perfect_hash(self._keys) if self._keys else None
+        if table is not None:
+            self._seeds, self._positions = table
+        else:
+            self._index = {key: pos for pos, key in enumerate(self._keys)}
+
+    def _position(self, key):
+        # Index of key in self._keys, or -1, in the compact form
+        if self._index is not None:
+            return self._index.get(key, -1)
+        n = len(self._keys)
+        if not n:
+            return -1
+        d = self._seeds[hash(key) % PRIME % n]
+        pos = self._positions[-d - 1 if d < 0 else hash((d, key)) % PRIME % n]
+        return pos if self._keys[pos] == key else -1
+
+    def __getitem__(self, key):
+        if self._forward is not None:
+            return self._forward[key]
+        pos = self._position(key)
+        if pos < 0:
+            raise KeyError(key)
+        return self._values[pos]
+
+    def __contains__(self, key):
+        if self._forward is not None:
+            return key in self._forward
+        return self._position(key) >= 0
+
+    def __iter__(self):
+        return iter(self._forward if self._forward is not None else self._keys)
+
+    def __len__(self):
+        return len(self._forward if self._forward is not None else self._keys)
+
+    def items(self):
+        if self._forward is not None:
+            return self._forward.items()
+        return zip(self._keys, self._values)
+
+    def values(self):
+        if self._forward is not None:
+            return self._forward.values()
+        return self._values
+
+    @property
+    def inverse(self):
+        if self._inverse is None:
+            if self._forward is not None:
+                # Shares the two dicts, swapped
+                inverse = type(self).__new__(type(self))
+                inverse._compact = False
+                inverse._forward, inverse._backward = self._backward, self._forward
+            else:
+                inverse = type(self)(zip(self._values, self._keys), compact=True)
+            inverse._inverse = self
+            self._inverse = inverse
+        return self._inverse
+
+    def where(self, predicate):
+        return FilteredView(self, predicate)
+
+    def _sorted_keys(self):
+        if self._keys is None:
+            try:
+                self._keys = tuple(sorted(self._forward))
+            except TypeError:
+                self._ordered = False
+        if not self._ordered:
+            raise TypeError(f'keys of this {type(self).__name__} cannot be ordered')
+        return self._keys
+
+    def range(self, lo=None, hi=None):
+        """
+        View of the keys k with lo <= k < hi, found by bisect on the sorted keys
+        """
+        keys = self._sorted_keys()
+        start = 0 if lo is None else bisect.bisect_left(keys, lo)
+        stop = len(keys) if hi is None else bisect.bisect_left(keys, hi)
+        return _RangeView(self, keys, start, max(start, stop))
+
+    def __hash__(self):
+        return hash(frozenset(self.items()))
+
+    def __repr__(self):
+        return f'{type(self).__name__}({dict(self.items())!r})'
+
+
+class _RangeView(collections.abc.Mapping):
+    # Contiguous run of a FrozenBiMap's sorted keys
+    def __init__(self, bimap, keys, start, stop):
+        self._bimap, self._keys, self._start, self._stop = bimap, keys, start, stop
+
+    def __getitem__(self, key):
+        try:
+            pos = bisect.bisect_left(self._keys, key, self._start, self._stop)
+        except TypeError:
+            raise KeyError(key) from None
+        if pos == self._stop or self._keys[pos] != key:
+            raise KeyError(key)
+        return self._bimap[key]
+
+    def __iter__(self):
+        return itertools.islice(self._keys, self._start, self._stop)
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __repr__(self):
+        return f'{type(self).__name__}({dict(self.items())!r})'
+
+
+if __name__ == '__main__':
+    import random
+    import sys
+    import time
+
+    from dictcomps import DIAL_CODES
+
+    country_code = BiMap((country, code) for code, country in DIAL_CODES)
+    print(country_code['India'], country_code.inverse[880])
+    frozen = country_code.freeze()
+    print(dict(frozen.inverse.range(hi=66)))
+    print({code: country.upper() for code, country in
+           country_code.inverse.where(lambda code, country: code < 66).items()})
+
+    # Memory and lookup speed of a large table against a pair of dicts
+    n = 100_000
+    codes = random.sample(range(10 * n), n)
+    names = [f'name{code}' for code in codes]
+    start = time.time()
+    forward = {name: code for name, code in zip(names, codes)}
+    backward = {code: name for name, code in forward.items()}
+    end = time.time()
+    print(f"two dictcomps:     {(end - start) * 1000:6.1f} ms")
+    start = time.time()
+    table = BiMap(zip(names, codes))
+    end = time.time()
+    print(f"BiMap:             {(end - start) * 1000:6.1f} ms")
+    frozen = {}
+    for compact in (False, True):
+        start = time.time()
+        frozen[compact] = table.freeze(compact)
+        inverse = frozen[compact].inverse
+        end = time.time()
+        print(f"freeze({compact}) + inverse: {(end - start) * 1000:6.1f} ms")
+        parts = ('_forward', '_backward', '_keys', '_values', '_index', '_seeds', '_positions')
+        # The two directions of the dict form share their dicts, count them once
+        held = {id(getattr(bm, part)): getattr(bm, part) for bm in (frozen[compact], inverse)
+                for part in parts if getattr(bm, part) is not None}
+        frozen_bytes = sum(sys.getsizeof(part) for part in held.values())
+        print(f"  index bytes, compact={compact}: {frozen_bytes >> 10} KiB")
+    dict_bytes = sys.getsizeof(forward) + sys.getsizeof(backward)
+    print(f"index bytes, two dicts: {dict_bytes >> 10} KiB")
+
+    queries = random.choices(names, k=100_000)
+    for label, mapping in (('dict', forward), ('BiMap', table), ('FrozenBiMap', frozen[False]),
+                           ('compact', frozen[True])):
+        start = time.time()
+        for name in queries:
+            mapping[name]
+        end = time.time()
+        print(f"{label:>12}: {(end - start) / len(queries) * 1e9:6.0f} ns/lookup")
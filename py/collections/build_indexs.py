@@ -1,28 +1,220 @@
 #
 # Build an index with word -> list of pairs(line_number, column_number)
 # Examples from 'Fluent Python' by Luciano Ramalho
+#
+# The index builder below scales the same idea to many large files: each file
+# is indexed in a worker process, postings are packed into array('I') buffers
+# of (file_id, line_no, column_no) triples instead of lists of tuples, and a
+# worker spills a sorted run to disk whenever its postings pass a memory cap.
+# The parent keeps the last, in-memory run of each file only while they all
+# fit under the same cap, and spills the rest as they arrive. The runs are then
+# merged word by word in sorted order.
 
 import re
 import collections
+import heapq
+import itertools
+import os
+import random
+import string
+import struct
+import tempfile
+from array import array
+from concurrent import futures
 
 WORD_RE = re.compile(r'\w+')
-# Our dictionary word -> list[(lno, cn),..., (lno, cn)]
-# Use default dictionary so that missing items return a
-# default value of []
-index = collections.defaultdict(list)
+# Default bytes of postings a worker keeps in memory before spilling a run
+MEMORY_CAP = 64 * 2 ** 20
+# Rough cost of one distinct word in a run: the str, its array and dict slot
+WORD_OVERHEAD = 150
+RUN_WORD = struct.Struct('<II')
+POSTING = 'I'
+# Items per posting: file_id, line_no, column_no
+WIDTH = 3
+
+
+def index_lines(lines, file_id=0):
+    """
+    Index an iterable of lines: word -> array('I') of (file_id, line, column)
+    """
+    index = collections.defaultdict(lambda: array(POSTING))
+    for line_no, line in enumerate(lines, 1):
+        for match in WORD_RE.finditer(line):
+            index[match.group()].extend((file_id, line_no, match.start() + 1))
+    return index
+
+
+def locations(postings):
+    """
+    Unpack a postings array into (file_id, line_no, column_no) tuples
+    """
+    it = iter(postings)
+    return list(zip(it, it, it))
+
+
+def _write_run(items, spill_dir):
+    # A run file holds (word length, item count, word, items) records in word order
+    fd, path = tempfile.mkstemp(suffix='.run', dir=spill_dir)
+    with os.fdopen(fd, 'wb') as fp:
+        for word, postings in items:
+            encoded = word.encode('utf-8')
+            fp.write(RUN_WORD.pack(len(encoded), len(postings)))
+            fp.write(encoded)
+            fp.write(memoryview(postings).cast('B'))
+    return path
+
+
+def _read_run(run):
+    # In-memory runs are already sorted (word, postings) lists
+    if not isinstance(run, str):
+        yield from run
+        return
+    itemsize = array(POSTING).itemsize
+    try:
+        with open(run, 'rb') as fp:
+            while True:
+                head = fp.read(RUN_WORD.size)
+                if not head:
+                    break
+                word_len, count = RUN_WORD.unpack(head)
+                word = fp.read(word_len).decode('utf-8')
+                postings = array(POSTING)
+                postings.frombytes(fp.read(count * itemsize))
+                yield word, postings
+    finally:
+        os.remove(run)
+
+
+def _index_file(file_id, path, memory_cap, spill_dir):
+    """
+    Worker: index one file, spilling sorted runs once postings pass memory_cap.
+    Returns the runs, as spill file paths or one final in-memory sorted list
+    """
+    runs = []
+    index = collections.defaultdict(lambda: array(POSTING))
+    matches = 0
+    posting_size = WIDTH * array(POSTING).itemsize
+    with open(path, encoding='utf-8', errors='replace') as fp:
+        for line_no, line in enumerate(fp, 1):
+            for match in WORD_RE.finditer(line):
+                index[match.group()].extend((file_id, line_no, match.start() + 1))
+                matches += 1
+            if matches * posting_size + len(index) * WORD_OVERHEAD > memory_cap:
+                runs.append(_write_run(sorted(index.items()), spill_dir))
+                index.clear()
+                matches = 0
+    if index:
+        runs.append(sorted(index.items()))
+    return runs
+
+
+def _run_size(items):
+    # Estimated bytes held by an in-memory run, on the scale of memory_cap
+    itemsize = array(POSTING).itemsize
+    return sum(len(postings) * itemsize + WORD_OVERHEAD for _, postings in items)
+
+
+def _collect_runs(results, memory_cap, spill_dir):
+    """
+    Runs of every file, in order, taken from results as the files finish. The
+    in-memory runs are kept while their total stays under memory_cap, the
+    others are spilled to disk
+    """
+    runs = []
+    held = 0
+    for file_runs in results:
+        for run in file_runs:
+            if not isinstance(run, str):
+                size = _run_size(run)
+                if held + size > memory_cap:
+                    run = _write_run(run, spill_dir)
+                else:
+                    held += size
+            runs.append(run)
+    return runs
+
+
+def iter_index(paths, processes=None, memory_cap=MEMORY_CAP, spill_dir=None):
+    """
+    Index many files and yield (word, postings) in word order, where postings
+    is an array('I') of (file_id, line_no, column_no) triples and file_id is
+    the position of the file in paths. processes=0 indexes in this process.
+    Postings of different runs are streamed, never all held in memory at once
+    """
+    spill_dir = spill_dir or tempfile.gettempdir()
+    if processes == 0:
+        runs = _collect_runs((_index_file(file_id, path, memory_cap, spill_dir)
+                              for file_id, path in enumerate(paths)),
+                             memory_cap, spill_dir)
+    else:
+        with futures.ProcessPoolExecutor(processes) as executor:
+            runs = _collect_runs(executor.map(_index_file, itertools.count(), paths,
+                                              itertools.repeat(memory_cap), itertools.repeat(spill_dir)),
+                                 memory_cap, spill_dir)
+    # Runs come in (file_id, spill order), so ties on the word keep postings sorted
+    runs = [_read_run(run) for run in runs]
+    merged = heapq.merge(*(((word, seq, postings) for word, postings in run)
+                           for seq, run in enumerate(runs)))
+    for word, group in itertools.groupby(merged, key=lambda item: item[0]):
+        postings = array(POSTING)
+        for _, _, part in group:
+            postings.extend(part)
+        yield word, postings
+
+
+def build_index(paths, **kwargs):
+    """
+    iter_index() collected into a dict of word -> postings
+    """
+    return dict(iter_index(paths, **kwargs))
+
+
+def random_words(count, seed=7):
+    """
+    count random lowercase words of 2 to 10 letters, for the demo corpora
+    """
+    rng = random.Random(seed)
+    return [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10)))
+            for _ in range(count)]
+
+
+def make_corpus(path, lines, words_per_line=12, seed=7, vocabulary=20_000):
+    """
+    Write lines of words_per_line words drawn from vocabulary, a list of
+    words or the size of a random_words() list, and return the vocabulary
+    """
+    if isinstance(vocabulary, int):
+        vocabulary = random_words(vocabulary, seed)
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as fp:
+        for _ in range(lines):
+            fp.write(' '.join(rng.choices(vocabulary, k=words_per_line)) + '\n')
+    return vocabulary
+
+
 filename = 'data/README.md'
 if __name__ == '__main__':
     # Open the file
     with open(filename, encoding='utf-8') as fp:
-        for line_no, line in enumerate(fp, 1):
-            for match in WORD_RE.finditer(line):
-                word = match.group()
-                column_no = match.start()+1
-                location = (line_no, column_no)
-
-                # Use default item if item not in the dict
-                index[word].append(location)
+        index = index_lines(fp)
 
     # Print in alphabetical order
     for word in sorted(index, key=str.upper):
-        print(word, index[word])
+        print(word, [loc[1:] for loc in locations(index[word])])
+
+    # Throughput over a generated corpus, serial and sharded across processes
+    import time
+
+    vocabulary = random_words(20_000)
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        paths = [os.path.join(corpus_dir, f'corpus_{n}.txt') for n in range(8)]
+        for n, path in enumerate(paths):
+            make_corpus(path, 50_000, seed=n, vocabulary=vocabulary)
+        size = sum(os.path.getsize(p) for p in paths) / 2 ** 20
+
+        for processes, cap in ((0, MEMORY_CAP), (None, MEMORY_CAP), (None, 2 ** 20)):
+            start = time.time()
+            words = sum(1 for _ in iter_index(paths, processes=processes, memory_cap=cap))
+            end = time.time()
+            print(f"processes={processes}, memory_cap={cap >> 20} MB: {words} words, "
+                  f"{size / (end - start):6.1f} MB/s")
@@ -0,0 +1,186 @@
+#
+# Query layer over the word index of build_indexs.py, for a dict built with
+# build_index() or an index_store.IndexStore:
+#
+#   word        exact lookup
+#   prefix*     every term starting with prefix, via bisect on the sorted terms
+#   "a b c"     phrase: the words next to each other, in order, on one line
+#
+# Postings carry (file_id, line_no, column_no) but no word positions, so a
+# phrase matches when each word starts at most max_gap characters after the
+# previous one ends. An extra word in between needs a separator on both sides
+# plus itself, at least 3 characters, so the default max_gap of 2 never
+# matches across another word; raise it to allow wider separators.
+
+import bisect
+import collections
+from array import array
+
+from build_indexs import WORD_RE, POSTING, locations
+from index_store import _Terms
+
+
+def gallop(seq, target, lo=0):
+    """
+    First position >= lo with seq[pos] >= target: doubling steps from lo,
+    then bisect, so short hops along a long list stay cheap
+    """
+    step, hi = 1, lo
+    while hi < len(seq) and seq[hi] < target:
+        lo = hi + 1
+        hi += step
+        step *= 2
+    return bisect.bisect_left(seq, target, lo, min(hi, len(seq)))
+
+
+class QueryEngine:
+    """
+    Exact, prefix, case-insensitive and phrase queries over a word index
+    """
+
+    def __init__(self, index, max_gap=2):
+        self.index = index
+        self.max_gap = max_gap
+        # A mapping needs its own sorted term list; a store is already sorted
+        self._terms = None if hasattr(index, 'lookup') else sorted(index)
+        self._folded = None
+        # Postings already fetched while a query_many() batch runs
+        self._batch_cache = None
+
+    def postings(self, word):
+        cache = self._batch_cache
+        if cache is not None and word in cache:
+            return cache[word]
+        if self._terms is None:
+            result = self.index.lookup(word)
+        else:
+            result = self.index.get(word, array(POSTING))
+        if cache is not None:
+            cache[word] = result
+        return result
+
+    def prefix_terms(self, prefix):
+        """
+        Every indexed term starting with prefix, in sorted order
+        """
+        if self._terms is not None:
+            lo = bisect.bisect_left(self._terms, prefix)
+            hi = bisect.bisect_left(self._terms, prefix + '\U0010ffff', lo)
+            return self._terms[lo:hi]
+        terms = _Terms(self.index)
+        key = prefix.encode('utf-8')
+        lo = bisect.bisect_left(terms, key)
+        # 0xff never occurs in utf-8, so it sorts after every continuation
+        hi = bisect.bisect_left(terms, key + b'\xff', lo)
+        return [terms[i].decode('utf-8') for i in range(lo, hi)]
+
+    def _all_terms(self):
+        if self._terms is not None:
+            return self._terms
+        return self.index.terms()
+
+    def variants(self, word):
+        """
+        Indexed terms equal to word ignoring case; the casefold map is built
+        from the term list (not the corpus) on first use
+        """
+        if self._folded is None:
+            folded = collections.defaultdict(list)
+            for term in self._all_terms():
+                folded[term.casefold()].append(term)
+            self._folded = folded
+        return self._folded.get(word.casefold(), [])
+
+    def _union(self, terms):
+        triples = sorted(triple for term in terms for triple in locations(self.postings(term)))
+        return array(POSTING, (n for triple in triples for n in triple))
+
+    def lookup(self, word, ignore_case=False):
+        if ignore_case:
+            return self._union(self.variants(word))
+        return self.postings(word)
+
+    def prefix(self, prefix, ignore_case=False):
+        if ignore_case:
+            # Case variants of a prefix can sort anywhere; fold every term
+            self.variants('')
+            terms = [term for key, group in self._folded.items() if key.startswith(prefix.casefold())
+                     for term in group]
+            return self._union(terms)
+        return self._union(self.prefix_terms(prefix))
+
+    def phrase(self, text, ignore_case=False):
+        """
+        Start positions of the words of text appearing next to each other
+        """
+        words = WORD_RE.findall(text)
+        if not words:
+            return array(POSTING)
+        lists = [locations(self.lookup(word, ignore_case)) for word in words]
+        # Walk the words left to right, keeping the partial matches as
+        # (file_id, line_no, start column, end column)
+        matches = [(f, l, c, c + len(words[0])) for f, l, c in lists[0]]
+        for word, occurrences in zip(words[1:], lists[1:]):
+            found, pos = [], 0
+            for file_id, line_no, start, end in matches:
+                pos = gallop(occurrences, (file_id, line_no, end + 1), pos)
+                if pos < len(occurrences):
+                    f, l, c = occurrences[pos]
+                    if (f, l) == (file_id, line_no) and c <= end + self.max_gap:
+                        found.append((file_id, line_no, start, c + len(word)))
+            matches = found
+            if not matches:
+                break
+        return array(POSTING, (n for f, l, c, _ in matches for n in (f, l, c)))
+
+    def query(self, text, ignore_case=False):
+        text = text.strip()
+        if len(text) > 1 and text[0] == text[-1] == '"':
+            return self.phrase(text[1:-1], ignore_case)
+        if text.endswith('*'):
+            return self.prefix(text[:-1], ignore_case)
+        return self.lookup(text, ignore_case)
+
+    def query_many(self, queries, ignore_case=False):
+        """
+        Answer a batch of queries, looking up each distinct word only once
+        """
+        self._batch_cache = {}
+        try:
+            return [self.query(q, ignore_case) for q in queries]
+        finally:
+            self._batch_cache = None
+
+
+if __name__ == '__main__':
+    import os
+    import random
+    import tempfile
+    import time
+
+    from build_indexs import build_index, make_corpus
+    from index_store import build_store
+
+    engine = QueryEngine(build_index(['data/README.md'], processes=0))
+    print('the*    ', locations(engine.query('the*'))[:4])
+    print('THE     ', len(engine.query('THE', ignore_case=True)) // 3, len(engine.query('THE')) // 3)
+    print('"the lost one"', locations(engine.query('"the lost one"')))
+
+    # Throughput over a generated corpus, from a dict and from a mapped store
+    random.seed(7)
+    with tempfile.TemporaryDirectory() as folder:
+        source = os.path.join(folder, 'corpus.txt')
+        vocabulary = make_corpus(source, 50_000, words_per_line=10, vocabulary=5_000)
+        queries = []
+        for _ in range(300):
+            words = random.sample(vocabulary, 2)
+            queries += [words[0], words[0][:2] + '*', f'"{words[0]} {words[1]}"']
+
+        for label, index in (('dict', build_index([source], processes=0)),
+                             ('IndexStore', build_store(os.path.join(folder, 'corpus.widx'), [source], processes=0))):
+            engine = QueryEngine(index)
+            start = time.time()
+            results = engine.query_many(queries)
+            end = time.time()
+            print(f"{label:>10}: {len(queries) / (end - start):8.0f} queries/sec, "
+                  f"{sum(len(r) // 3 for r in results)} hits")
@@ -0,0 +1,326 @@
+#
+# Persistent, memory-mapped form of the word -> locations index built by
+# build_indexs.py, so a process can answer lookups at startup without
+# rebuilding the index from its source files.
+#
+# File layout (integers little-endian, sections padded to 8 bytes):
+#
+#   header        magic b'WIDX', version, term count, section offsets
+#   postings      per term: varint triple count, then delta-encoded triples
+#   terms         utf-8 terms back to back, in sorted order
+#   term index    array('Q') of n + 1 offsets into the terms section
+#   posting index array('Q') of n + 1 offsets into the postings section
+#   metadata      JSON: the source files and how much of each was indexed
+#
+# A triple is (file_id, line_no, column_no). Within a term's postings the file
+# id is stored as a delta, the line as a delta while the file stays the same,
+# and the column as is; all as varints.
+
+import bisect
+import io
+import json
+import os
+import struct
+from array import array
+from mmap import mmap, ACCESS_READ
+
+from build_indexs import WORD_RE, POSTING, iter_index
+
+MAGIC = b'WIDX'
+VERSION = 1
+HEADER = struct.Struct('<4sI7Q')
+OFFSET = 'Q'
+
+
+def _encode_postings(postings):
+    out = bytearray()
+
+    def varint(n):
+        while n >= 0x80:
+            out.append((n & 0x7F) | 0x80)
+            n >>= 7
+        out.append(n)
+
+    varint(len(postings) // 3)
+    prev_file, prev_line = 0, 0
+    for i in range(0, len(postings), 3):
+        file_id, line_no, column_no = postings[i:i + 3]
+        varint(file_id - prev_file)
+        varint(line_no - prev_line if file_id == prev_file else line_no)
+        varint(column_no)
+        prev_file, prev_line = file_id, line_no
+    return out
+
+
+def _decode_postings(buf):
+    values = []
+    n = shift = 0
+    for byte in buf:
+        n |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(n)
+            n = shift = 0
+    postings = array(POSTING)
+    prev_file, prev_line = 0, 0
+    for i in range(1, 1 + 3 * values[0], 3):
+        file_delta, line, column_no = values[i:i + 3]
+        file_id = prev_file + file_delta
+        line_no = prev_line + line if file_delta == 0 else line
+        postings.extend((file_id, line_no, column_no))
+        prev_file, prev_line = file_id, line_no
+    return postings
+
+
+def _pad(fp):
+    fp.write(b'\0' * (-fp.tell() % 8))
+
+
+def write_store(path, items, files):
+    """
+    Write (term, postings) pairs, in sorted term order, and the files metadata
+    """
+    terms = bytearray()
+    term_offsets = array(OFFSET, [0])
+    post_offsets = array(OFFSET, [0])
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as fp:
+        fp.write(b'\0' * HEADER.size)
+        post_start = fp.tell()
+        for term, postings in items:
+            fp.write(_encode_postings(postings))
+            post_offsets.append(fp.tell() - post_start)
+            terms += term.encode('utf-8')
+            term_offsets.append(len(terms))
+        _pad(fp)
+        term_start = fp.tell()
+        fp.write(terms)
+        _pad(fp)
+        term_index = fp.tell()
+        fp.write(memoryview(term_offsets).cast('B'))
+        post_index = fp.tell()
+        fp.write(memoryview(post_offsets).cast('B'))
+        meta = json.dumps({'files': files}).encode('utf-8')
+        meta_start = fp.tell()
+        fp.write(meta)
+        fp.seek(0)
+        fp.write(HEADER.pack(MAGIC, VERSION, len(term_offsets) - 1, post_start, term_start,
+                             term_index, post_index, meta_start, len(meta)))
+    # Readers of the old file keep their mapping; new readers see the new one
+    os.replace(tmp_path, path)
+
+
+def _describe(path):
+    # What update_store() needs to know to index only what gets appended later
+    size = os.path.getsize(path)
+    lines = ends_with_newline = 0
+    # Count lines the way the indexer reads them, in text mode
+    with open(path, encoding='utf-8', errors='replace') as fp:
+        for lines, line in enumerate(fp, 1):
+            ends_with_newline = line.endswith('\n')
+    return {'path': os.path.abspath(path), 'size': size, 'lines': lines,
+            'complete': bool(ends_with_newline) or size == 0}
+
+
+def build_store(path, sources, **kwargs):
+    """
+    Index the source files with build_indexs.iter_index() and persist the result
+    """
+    sources = list(sources)
+    files = [_describe(source) for source in sources]
+    write_store(path, iter_index(sources, **kwargs), files)
+    return IndexStore(path)
+
+
+class _Terms:
+    # Sequence view of the sorted terms as bytes, for bisect
+    def __init__(self, store):
+        self._store = store
+
+    def __len__(self):
+        return len(self._store)
+
+    def __getitem__(self, i):
+        return self._store._term_bytes(i)
+
+
+class IndexStore:
+    """
+    Read-only, memory-mapped index. Opening it reads only the header and
+    metadata; lookups binary search the term index in the mapping
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as fp:
+            self._map = mmap(fp.fileno(), 0, access=ACCESS_READ)
+        (magic, version, self._n, self._post_start, self._term_start, term_index,
+         post_index, meta_start, meta_len) = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not an index store: magic {magic!r}')
+        if version != VERSION:
+            raise ValueError(f'unsupported index store version {version}')
+        memv = memoryview(self._map)
+        width = array(OFFSET).itemsize
+        self._term_offsets = memv[term_index:term_index + (self._n + 1) * width].cast(OFFSET)
+        self._post_offsets = memv[post_index:post_index + (self._n + 1) * width].cast(OFFSET)
+        self.files = json.loads(bytes(memv[meta_start:meta_start + meta_len]))['files']
+
+    def __len__(self):
+        return self._n
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.path!r}, {self._n} terms)'
+
+    def _term_bytes(self, i):
+        start = self._term_start
+        return self._map[start + self._term_offsets[i]:start + self._term_offsets[i + 1]]
+
+    def _find(self, word):
+        key = word.encode('utf-8')
+        i = bisect.bisect_left(_Terms(self), key)
+        if i < self._n and self._term_bytes(i) == key:
+            return i
+        return -1
+
+    def __contains__(self, word):
+        return self._find(word) >= 0
+
+    def _postings(self, i):
+        start = self._post_start
+        return _decode_postings(self._map[start + self._post_offsets[i]:start + self._post_offsets[i + 1]])
+
+    def lookup(self, word):
+        """
+        Postings array('I') of (file_id, line_no, column_no) triples for word
+        """
+        i = self._find(word)
+        if i < 0:
+            return array(POSTING)
+        return self._postings(i)
+
+    def terms(self):
+        return (self._term_bytes(i).decode('utf-8') for i in range(self._n))
+
+    def items(self):
+        return ((self._term_bytes(i).decode('utf-8'), self._postings(i)) for i in range(self._n))
+
+    def close(self):
+        self._term_offsets.release()
+        self._post_offsets.release()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _index_appended(file_id, info):
+    # Index the lines appended to a file since it was last indexed
+    index = {}
+    with open(info['path'], 'rb') as raw:
+        raw.seek(info['size'])
+        with io.TextIOWrapper(raw, encoding='utf-8', errors='replace') as fp:
+            for line_no, line in enumerate(fp, info['lines'] + 1):
+                for match in WORD_RE.finditer(line):
+                    index.setdefault(match.group(), array(POSTING)).extend(
+                        (file_id, line_no, match.start() + 1))
+    return index
+
+
+def update_store(path, **kwargs):
+    """
+    Bring the store at path up to date with its source files. Files that only
+    gained lines are indexed from where the last pass stopped and merged into
+    the stored postings; if any file shrank or lacked a final newline, the
+    whole store is rebuilt. Returns the reopened IndexStore
+    """
+    with IndexStore(path) as store:
+        files = store.files
+        appended = []
+        for file_id, info in enumerate(files):
+            size = os.path.getsize(info['path'])
+            if size == info['size']:
+                continue
+            if size < info['size'] or not info['complete']:
+                break
+            appended.append(file_id)
+        else:
+            if not appended:
+                return IndexStore(path)
+            new = {}
+            for file_id in appended:
+                for word, postings in _index_appended(file_id, files[file_id]).items():
+                    new.setdefault(word, array(POSTING)).extend(postings)
+            merged = _merge(store.items(), new)
+            write_store(path, merged, [_describe(info['path']) if i in appended else info
+                                       for i, info in enumerate(files)])
+            return IndexStore(path)
+    return build_store(path, [info['path'] for info in files], **kwargs)
+
+
+def _merge(items, new):
+    # Stream the stored (term, postings) pairs, folding in the new postings
+    pending = sorted(new)
+    j = 0
+    for term, postings in items:
+        while j < len(pending) and pending[j] < term:
+            yield pending[j], new[pending[j]]
+            j += 1
+        if j < len(pending) and pending[j] == term:
+            triples = sorted(zip(*[iter(postings + new[term])] * 3))
+            postings = array(POSTING, (n for triple in triples for n in triple))
+            j += 1
+        yield term, postings
+    for term in pending[j:]:
+        yield term, new[term]
+
+
+if __name__ == '__main__':
+    import tempfile
+    import time
+
+    from build_indexs import build_index, make_corpus
+
+    with tempfile.TemporaryDirectory() as folder:
+        source = os.path.join(folder, 'poem.txt')
+        with open('data/README.md', encoding='utf-8') as src, open(source, 'w', encoding='utf-8') as dst:
+            dst.write(src.read())
+        store_path = os.path.join(folder, 'poem.widx')
+
+        start = time.time()
+        store = build_store(store_path, [source], processes=0)
+        end = time.time()
+        print(f"{store} built in {(end - start) * 1000:4.2f} ms")
+        assert dict(store.items()) == build_index([source], processes=0)
+        store.close()
+
+        start = time.time()
+        store = IndexStore(store_path)
+        hits = [store.lookup(word) for word in ('the', 'glove', 'missing')]
+        end = time.time()
+        print(f"open + 3 lookups: {(end - start) * 1000:4.3f} ms", [len(h) // 3 for h in hits])
+
+        with open(source, 'a', encoding='utf-8') as dst:
+            dst.write('the glove was found\n')
+        store.close()
+        store = update_store(store_path)
+        print(store.lookup('found'), store.lookup('glove')[-3:])
+        assert dict(store.items()) == build_index([source], processes=0)
+
+        # Lookup latency on a larger generated corpus
+        import random
+        random.seed(7)
+        vocabulary = make_corpus(source, 100_000, vocabulary=50_000)
+        store.close()
+        store = build_store(store_path, [source], processes=0)
+        words = random.sample(vocabulary, 1000)
+        start = time.time()
+        for word in words:
+            store.lookup(word)
+        end = time.time()
+        print(f"{store}, {os.path.getsize(store_path) >> 20} MB: {(end - start) / len(words) * 1e6:5.1f} us/lookup")
+        store.close()
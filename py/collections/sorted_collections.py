@@ -0,0 +1,392 @@
+#
+# Sorted containers built on the bisect helpers shown in insertions.py.
+#
+# A plain sorted list pays an O(n) memmove for every insort. SortedList keeps
+# its values in a list of sorted sub-lists of about LOAD items each, plus the
+# maximum of every sub-list, so an insert or delete bisects twice and moves at
+# most 2 * LOAD items. A Fenwick tree over the sub-list lengths (rebuilt only
+# when sub-lists split or vanish) turns positions into (sub-list, offset)
+# pairs for indexing and rank queries in O(log n).
+
+import bisect
+import collections.abc
+import copy
+import itertools
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+LOAD = 1000
+
+
+class SortedList:
+    """
+    Sorted sequence with O(log n) amortized add, remove, index and rank
+    """
+
+    def __init__(self, iterable=(), load=LOAD):
+        self._load = load
+        self._lists = []
+        self._maxes = []
+        self._len = 0
+        self._tree = None
+        self.update(iterable)
+
+    # -- positional index -------------------------------------------------
+    def _build_tree(self):
+        tree = [len(sub) for sub in self._lists]
+        for i in range(len(tree)):
+            parent = i | (i + 1)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, pos, delta):
+        # Keep the tree in step with a sub-list that grew or shrank in place
+        tree = self._tree
+        if tree is None:
+            return
+        while pos < len(tree):
+            tree[pos] += delta
+            pos |= pos + 1
+
+    def _offset(self, pos):
+        # Number of values in the sub-lists before sub-list pos
+        if self._tree is None:
+            self._build_tree()
+        total, tree = 0, self._tree
+        while pos > 0:
+            total += tree[pos - 1]
+            pos &= pos - 1
+        return total
+
+    def _locate(self, index):
+        # (sub-list, offset) of the value at a non-negative global index
+        if self._tree is None:
+            self._build_tree()
+        tree, pos, step = self._tree, 0, 1 << len(self._tree).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= len(tree) and tree[nxt - 1] <= index:
+                index -= tree[nxt - 1]
+                pos = nxt
+            step >>= 1
+        return pos, index
+
+    # -- mutation ---------------------------------------------------------
+    def add(self, value):
+        if not self._maxes:
+            self._lists.append([value])
+            self._maxes.append(value)
+            self._tree = None
+        else:
+            pos = bisect.bisect_right(self._maxes, value)
+            if pos == len(self._maxes):
+                pos -= 1
+                self._lists[pos].append(value)
+                self._maxes[pos] = value
+            else:
+                bisect.insort(self._lists[pos], value)
+            self._tree_add(pos, 1)
+            self._split(pos)
+        self._len += 1
+
+    def _split(self, pos):
+        sub = self._lists[pos]
+        if len(sub) > 2 * self._load:
+            half = sub[self._load:]
+            del sub[self._load:]
+            self._maxes[pos] = sub[-1]
+            self._lists.insert(pos + 1, half)
+            self._maxes.insert(pos + 1, half[-1])
+            self._tree = None
+
+    def update(self, iterable):
+        """
+        Add many values at once: one sort, then the sub-lists are rebuilt
+        """
+        values = sorted(itertools.chain(self, iterable))
+        self._lists = [values[i:i + self._load] for i in range(0, len(values), self._load)]
+        self._maxes = [sub[-1] for sub in self._lists]
+        self._len = len(values)
+        self._tree = None
+
+    def _delete(self, pos, idx):
+        sub = self._lists[pos]
+        del sub[idx]
+        self._len -= 1
+        if not sub:
+            del self._lists[pos]
+            del self._maxes[pos]
+            self._tree = None
+        else:
+            self._maxes[pos] = sub[-1]
+            self._tree_add(pos, -1)
+
+    def discard(self, value):
+        pos = bisect.bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            return False
+        sub = self._lists[pos]
+        idx = bisect.bisect_left(sub, value)
+        if sub[idx] != value:
+            return False
+        self._delete(pos, idx)
+        return True
+
+    def remove(self, value):
+        if not self.discard(value):
+            raise ValueError(f'{value!r} not in {type(self).__name__}')
+
+    def pop(self, index=-1):
+        value = self[index]
+        del self[index]
+        return value
+
+    def clear(self):
+        self._lists, self._maxes, self._len, self._tree = [], [], 0, None
+
+    # -- sequence protocol ------------------------------------------------
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self._lists)
+
+    def __reversed__(self):
+        return itertools.chain.from_iterable(reversed(sub) for sub in reversed(self._lists))
+
+    def __contains__(self, value):
+        pos = bisect.bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            return False
+        sub = self._lists[pos]
+        return sub[bisect.bisect_left(sub, value)] == value
+
+    def _index(self, index):
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError(f'{type(self).__name__} index out of range')
+        return index
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index] if index.step not in (None, 1) else self._slice(index)
+        pos, idx = self._locate(self._index(index))
+        return self._lists[pos][idx]
+
+    def _slice(self, index):
+        start, stop, _ = index.indices(self._len)
+        if start >= stop:
+            return []
+        pos, idx = self._locate(start)
+        result = []
+        while len(result) < stop - start:
+            result.extend(self._lists[pos][idx:idx + stop - start - len(result)])
+            pos, idx = pos + 1, 0
+        return result
+
+    def __delitem__(self, index):
+        pos, idx = self._locate(self._index(index))
+        self._delete(pos, idx)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({list(self)!r})'
+
+    # -- rank and range queries ------------------------------------------
+    def bisect_left(self, value):
+        """
+        Number of values < value, i.e. the rank of value
+        """
+        pos = bisect.bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            return self._len
+        return self._offset(pos) + bisect.bisect_left(self._lists[pos], value)
+
+    def bisect_right(self, value):
+        """
+        Number of values <= value
+        """
+        pos = bisect.bisect_right(self._maxes, value)
+        if pos == len(self._maxes):
+            return self._len
+        return self._offset(pos) + bisect.bisect_right(self._lists[pos], value)
+
+    def index(self, value):
+        rank = self.bisect_left(value)
+        if rank == self._len or self[rank] != value:
+            raise ValueError(f'{value!r} not in {type(self).__name__}')
+        return rank
+
+    def count(self, value):
+        return self.bisect_right(value) - self.bisect_left(value)
+
+    def irange(self, minimum, maximum):
+        """
+        Values v with minimum <= v <= maximum, lazily in order
+        """
+        start, stop = self.bisect_left(minimum), self.bisect_right(maximum)
+        if start >= stop:
+            return iter(())
+        pos, idx = self._locate(start)
+        first = itertools.islice(self._lists[pos], idx, None)
+        rest = itertools.chain.from_iterable(self._lists[pos + 1:])
+        return itertools.islice(itertools.chain(first, rest), stop - start)
+
+
+class SortedDict(dict):
+    """
+    dict whose keys iterate in sorted order, with positional and range access
+    """
+
+    def __init__(self, other=(), **kwargs):
+        super().__init__(other, **kwargs)
+        self._keys = SortedList(super().keys())
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._keys.add(key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._keys.remove(key)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __reversed__(self):
+        return reversed(self._keys)
+
+    # Views over the sorted keys; the dict's own views would follow
+    # insertion order
+    def keys(self):
+        return collections.abc.KeysView(self)
+
+    def values(self):
+        return collections.abc.ValuesView(self)
+
+    def items(self):
+        return collections.abc.ItemsView(self)
+
+    def update(self, other=(), **kwargs):
+        pairs = ((key, other[key]) for key in other.keys()) if hasattr(other, 'keys') else other
+        for key, value in itertools.chain(pairs, kwargs.items()):
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        if key in self:
+            self._keys.remove(key)
+        return super().pop(key, *default)
+
+    def popitem(self, index=-1):
+        key = self._keys.pop(index)
+        return key, super().pop(key)
+
+    def clear(self):
+        super().clear()
+        self._keys.clear()
+
+    def copy(self):
+        return type(self)(self)
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo):
+        return type(self)(copy.deepcopy(dict(self.items()), memo))
+
+    def __reduce__(self):
+        # Rebuild through __init__: the default protocol would restore the
+        # items through __setitem__ before _keys exists
+        return type(self), (dict(self.items()),)
+
+    def __or__(self, other):
+        if not isinstance(other, dict):
+            return NotImplemented
+        merged = self.copy()
+        merged.update(other)
+        return merged
+
+    def __ror__(self, other):
+        if not isinstance(other, dict):
+            return NotImplemented
+        merged = type(self)(other)
+        merged.update(self)
+        return merged
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def peekitem(self, index=-1):
+        key = self._keys[index]
+        return key, self[key]
+
+    def index(self, key):
+        return self._keys.index(key)
+
+    def irange(self, minimum, maximum):
+        return self._keys.irange(minimum, maximum)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({dict(self.items())!r})'
+
+
+def grade(scores, breakpoints=(60, 70, 80, 90), grades='FDCBA'):
+    """
+    insertions.grade() for many scores at once, as a list of letter grades:
+    with NumPy one searchsorted call maps every score to its letter grade
+    """
+    if np is not None:
+        positions = np.searchsorted(np.asarray(breakpoints), np.asarray(scores), side='right')
+        return np.asarray(list(grades))[positions].tolist()
+    return [grades[bisect.bisect(breakpoints, score)] for score in scores]
+
+
+if __name__ == '__main__':
+    import random
+    import time
+
+    sl = SortedList([5, 1, 4, 1])
+    sl.add(3)
+    print(sl, sl[0], sl[-1], sl.bisect_left(4), sl.count(1), list(sl.irange(2, 4)))
+    sd = SortedDict({'b': 2, 'a': 1})
+    sd['c'] = 3
+    print(sd, sd.peekitem(0), list(sd.irange('b', 'z')))
+    print(''.join(grade([33, 99, 77, 70, 89, 90, 100])))
+
+    n = 200_000
+    values = [random.random() for _ in range(n)]
+    start = time.time()
+    plain = []
+    for v in values:
+        bisect.insort(plain, v)
+    end = time.time()
+    print(f"bisect.insort into a list: {n / (end - start):10.0f} inserts/sec")
+    start = time.time()
+    chunked = SortedList()
+    for v in values:
+        chunked.add(v)
+    end = time.time()
+    print(f"SortedList.add:            {n / (end - start):10.0f} inserts/sec")
+    assert list(chunked) == plain
+    start = time.time()
+    for v in values[:20_000]:
+        chunked.bisect_left(v)
+        chunked.remove(v)
+    end = time.time()
+    print(f"SortedList rank + remove:  {20_000 / (end - start):10.0f} ops/sec")
+
+    scores = [random.uniform(0, 100) for _ in range(1_000_000)]
+    start = time.time()
+    letters = grade(scores)
+    end = time.time()
+    print(f"grade() of {len(scores)} scores: {(end - start) * 1000:6.1f} ms")
@@ -3,6 +3,8 @@
 # keys. that is given a non-str, it'll convert it not a str
 
 import collections
+import collections.abc
+import math
 
 class StrKeyDict(collections.UserDict):
 
@@ -12,10 +14,130 @@ class StrKeyDict(collections.UserDict):
         return self[str(key)]
 
     def __contains__(self, item):
-        return str(key) in self.data
+        return str(item) in self.data
 
     def __setitem__(self, key, value):
-        self.data[key] = value
+        self.data[str(key)] = value
+
+
+# str() of non-str keys seen so far, as key -> (type, str). The type check
+# keeps 1, 1.0 and True apart, since they are equal as dict keys
+_KEY_STRS = {}
+_KEY_STRS_MAX = 4096
+# Immutable built-ins whose str() never changes, so it can be cached; other
+# keys (and tuples holding them) are converted on every use
+_CACHED_TYPES = frozenset({int, bool, float, bytes})
+
+
+def _signature(key):
+    # Cache key for a tuple: equal tuples may print differently, as (1,) and
+    # (1.0,) or (0.0,) and (-0.0,) do, so the types and zero signs are kept
+    cls = type(key)
+    if cls is tuple:
+        parts = tuple(map(_signature, key))
+        return None if None in parts else (cls, parts)
+    if cls is float:
+        return cls, key, math.copysign(1.0, key)
+    if cls in _CACHED_TYPES:
+        return cls, key
+    return None
+
+
+def _key_str(key):
+    cls = type(key)
+    if cls is tuple:
+        cache_key = _signature(key)
+        if cache_key is None:
+            return str(key)
+    elif cls in _CACHED_TYPES and not (cls is float and key == 0):
+        cache_key = key
+    else:
+        # Mutable or unhashable keys, and 0.0 which equals -0.0
+        return str(key)
+    hit = _KEY_STRS.get(cache_key)
+    if hit is not None and hit[0] is cls:
+        return hit[1]
+    if len(_KEY_STRS) >= _KEY_STRS_MAX:
+        _KEY_STRS.clear()
+    entry = _KEY_STRS[cache_key] = (cls, str(key))
+    return entry[1]
+
+
+def _normalized(pairs):
+    for key, value in pairs:
+        yield (key if type(key) is str else _key_str(key)), value
+
+
+class FastStrKeyDict(dict):
+    """
+    StrKeyDict as a dict subclass: keys are converted to str once, on insert,
+    so lookups with str keys run entirely in the C dict code. Only lookups
+    with non-str keys reach __missing__, which uses the cached conversions
+    """
+
+    def __init__(self, other=(), **kwargs):
+        super().__init__()
+        self.update(other, **kwargs)
+
+    def __missing__(self, key):
+        if type(key) is str:
+            raise KeyError(key)
+        return self[_key_str(key)]
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key if type(key) is str else _key_str(key), value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key if type(key) is str else _key_str(key))
+
+    def __contains__(self, key):
+        return super().__contains__(key if type(key) is str else _key_str(key))
+
+    def get(self, key, default=None):
+        return super().get(key if type(key) is str else _key_str(key), default)
+
+    def pop(self, key, *default):
+        return super().pop(key if type(key) is str else _key_str(key), *default)
+
+    def setdefault(self, key, default=None):
+        return super().setdefault(key if type(key) is str else _key_str(key), default)
+
+    def update(self, other=(), **kwargs):
+        # A StrKeyDict is already normalized; dict.update copies it in C
+        if isinstance(other, FastStrKeyDict):
+            super().update(other)
+        else:
+            if isinstance(other, collections.abc.Mapping):
+                other = other.items()
+            super().update(_normalized(other))
+        if kwargs:
+            super().update(kwargs)
+
+    def copy(self):
+        return type(self)(self)
+
+    # dict's own | and |= would store the other mapping's keys unconverted
+    def __or__(self, other):
+        if not isinstance(other, collections.abc.Mapping):
+            return NotImplemented
+        merged = self.copy()
+        merged.update(other)
+        return merged
+
+    def __ror__(self, other):
+        if not isinstance(other, collections.abc.Mapping):
+            return NotImplemented
+        merged = type(self)(other)
+        merged.update(self)
+        return merged
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    @classmethod
+    def fromkeys(cls, keys, value=None):
+        return cls((key, value) for key in keys)
 
 if __name__ == '__main__':
 
@@ -31,4 +153,21 @@ if __name__ == '__main__':
     print(usr_dd.get('2'))
     print(usr_dd.get('4'))
     print(usr_dd.get(5))
+    print(2 in usr_dd, 5 in usr_dd)
+
+    fast_dd = FastStrKeyDict([('2', 'two'), (4, 'four')])
+    print(fast_dd, fast_dd[2], fast_dd['4'], fast_dd.get(4), 2 in fast_dd, fast_dd.get(5))
+
+    # Lookup throughput, with str keys and with int keys that need converting
+    import timeit
+    pairs = [(str(n), n) for n in range(10_000)]
+    str_keys = [str(n) for n in range(0, 10_000, 7)]
+    int_keys = list(range(0, 10_000, 7))
+    for cls in (StrKeyDict, FastStrKeyDict):
+        d = cls(pairs)
+        for label, keys in (('str', str_keys), ('int', int_keys)):
+            secs = timeit.timeit(lambda: [d[k] for k in keys], number=20)
+            print(f"{cls.__name__:>14} {label} keys: {len(keys) * 20 / secs:12.0f} lookups/sec")
+    secs = timeit.timeit(lambda: FastStrKeyDict(zip(range(100_000), range(100_000))), number=5)
+    print(f"FastStrKeyDict bulk update: {100_000 * 5 / secs:12.0f} items/sec")
 
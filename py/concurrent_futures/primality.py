@@ -0,0 +1,175 @@
+"""
+Primality tests for the CPU bound demos, which ask is_prime() about the same
+ranges over and over.
+
+Small n are answered from a sieve kept as a bitset of the odd numbers: the
+cache is built on first use and regrown (doubling) when asked past its end,
+up to CACHE_LIMIT. Larger n go to Miller-Rabin with the first twelve primes
+as bases, which is deterministic for every n < 3.3 * 10 ** 24, so for all
+64-bit integers. is_prime_many() answers a whole array or range at once,
+vectorized with NumPy when it is installed.
+"""
+import math
+import numbers
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Numbers below this are answered from the sieve cache: 2 MiB of bits
+CACHE_LIMIT = 1 << 25
+MR_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+# '0' and '1' for byte values 0 and 1, to pack sieve flags into bits
+_ASCII_BITS = bytes.maketrans(b'\x00\x01', b'01')
+
+# (limit, bits): bit i of bits is set when 2 * i + 1 < limit is prime.
+# Replaced as a whole when it grows, so threads always see a consistent pair
+_cache = (0, b'')
+
+
+def _sieve_bits(limit):
+    # Bitset of the odd primes below limit, as little-endian packed bytes
+    flags = bytearray([1]) * ((limit + 1) // 2)
+    flags[0] = 0
+    for i in range(1, (math.isqrt(limit) + 1) // 2):
+        if flags[i]:
+            p = 2 * i + 1
+            start = p * p // 2
+            flags[start::p] = bytes(len(range(start, len(flags), p)))
+    # Reversed '0'/'1' digits read in base 2 put flag i at bit i
+    packed = int(flags.translate(_ASCII_BITS)[::-1], 2)
+    return packed.to_bytes((len(flags) + 7) // 8, 'little')
+
+
+def _grow(n):
+    global _cache
+    limit = min(CACHE_LIMIT, max(n + 1, 2 * _cache[0], 1 << 16))
+    _cache = (limit, _sieve_bits(limit))
+    return _cache
+
+
+def _miller_rabin(n):
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in MR_BASES:
+        if a % n == 0:
+            continue
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def is_prime(n):
+    if n < 3:
+        return n == 2
+    if n % 2 == 0:
+        return False
+    limit, bits = _cache
+    if n >= limit:
+        if n >= CACHE_LIMIT:
+            return _miller_rabin(n)
+        limit, bits = _grow(n)
+    i = n >> 1
+    return bool(bits[i >> 3] >> (i & 7) & 1)
+
+
+def _check_int(n):
+    if not isinstance(n, numbers.Integral):
+        raise TypeError(f'is_prime_many() needs integers, not {type(n).__name__}')
+    return n
+
+
+def is_prime_many(values):
+    """
+    is_prime() of every value of an integer array, range or iterable of ints:
+    a NumPy bool array when NumPy is installed, else a list of bools. Floats
+    raise TypeError rather than being rounded
+    """
+    if np is None:
+        return [is_prime(_check_int(n)) for n in values]
+    if isinstance(values, range):
+        values = np.arange(values.start, values.stop, values.step, dtype=np.int64)
+    elif not isinstance(values, np.ndarray):
+        values = [_check_int(n) for n in values]
+        try:
+            values = np.array(values, dtype=np.int64)
+        except OverflowError:
+            # Ints past int64 stay exact Python ints in an object array
+            values = np.array(values, dtype=object)
+    if values.dtype.kind == 'O':
+        for n in values.flat:
+            _check_int(n)
+    elif values.dtype.kind not in 'biu':
+        raise TypeError(f'is_prime_many() needs integers, not {values.dtype} values')
+    result = np.zeros(values.shape, dtype=bool)
+    if values.size == 0:
+        return result
+    top = int(values.max())
+    limit, bits = _cache
+    if top >= limit:
+        # Cover as much of the values as the cache may, even when some are
+        # past CACHE_LIMIT and go to Miller-Rabin
+        limit, bits = _grow(min(top, CACHE_LIMIT - 1))
+    small = (values < limit) & (values >= 0)
+    odd = small & (values % 2 == 1)
+    index = values[odd].astype(np.int64) >> 1
+    table = np.frombuffer(bits, dtype=np.uint8)
+    result[odd] = (table[index >> 3] >> (index & 7)) & 1 == 1
+    result[values == 2] = True
+    # Beyond the cache one at a time
+    large = values >= limit
+    for position in np.flatnonzero(large):
+        result.flat[position] = is_prime(int(values.flat[position]))
+    return result
+
+
+if __name__ == '__main__':
+    import time
+
+    def trial_division(n):
+        # The helper this module replaces in thread_and_mulitprocess_2.py
+        for divisor in range(2, int(n ** 0.5) + 1):
+            if n % divisor == 0:
+                return False
+        return True
+
+    print([n for n in range(30) if is_prime(n)], is_prime(2 ** 61 - 1), is_prime(2 ** 64 - 59))
+    assert [n for n in range(2, 10_000) if is_prime(n)] == [n for n in range(2, 10_000) if trial_division(n)]
+    assert list(is_prime_many(range(10_000))) == [is_prime(n) for n in range(10_000)]
+    # Mixed sizes must not go through float64, nor floats be taken as ints
+    assert list(is_prime_many([2 ** 64 - 59, 5, 2 ** 61 - 1])) == [True, True, True]
+    try:
+        is_prime_many([1e6 + 3, 7.0])
+    except TypeError:
+        pass
+    else:
+        raise AssertionError('float values accepted')
+
+    num = 1_000_000
+    for label, test in (('trial division', trial_division), ('is_prime', is_prime)):
+        start = time.time()
+        for _ in range(3):
+            count = sum(1 for n in range(2, num) if test(n))
+        end = time.time()
+        print(f"{label:>14}: 3 passes over {num}: {end - start:6.2f} sec, {count} primes")
+    start = time.time()
+    for _ in range(3):
+        count = int(is_prime_many(range(num)).sum()) if np is not None else sum(is_prime_many(range(num)))
+    end = time.time()
+    print(f"{'is_prime_many':>14}: 3 passes over {num}: {end - start:6.2f} sec, {count} primes")
+
+    large = range(2 ** 63, 2 ** 63 + 10_000)
+    start = time.time()
+    count = sum(1 for n in large if is_prime(n))
+    end = time.time()
+    print(f"Miller-Rabin: {len(large) / (end - start):8.0f} 64-bit numbers/sec, {count} primes")
@@ -7,18 +7,14 @@ import multiprocessing as mp
 import concurrent.futures as mt
 import time
 
+# Sieve cache for small n, Miller-Rabin above; replaces trial division
+from primality import is_prime
+
 
 def get_cpu_count():
     return mp.cpu_count()
 
 
-def is_prime(n):
-    for divisor in range(2, int(n ** 0.5) + 1):
-        if n % divisor == 0:
-            return False
-    return True
-
-
 if __name__ == '__main__':
 
     # A CPU bound task
@@ -1,5 +1,7 @@
 from collections import namedtuple
 
+from coroutil import Stats, stats_averager, merge_results
+
 Result = namedtuple('Result', 'count average')
 
 
@@ -19,8 +21,8 @@ def averager():
         count += 1
         average = total / count
         print("total={}; count={}; average={}".format(total, count, average))
-        # The returned Result will be the value of the yield from expression in grouper
-        return Result(count, average)
+    # The returned Result will be the value of the yield from expression in grouper
+    return Result(count, average)
 
 
 
@@ -72,6 +74,37 @@ def report(results):
         print('{:2} {:5} averaging {:2f}{}'.format(
             result.count, group, result.average, unit))
 
+# The same delegation for batches: each send() carries a whole list or array
+# of values and the averager keeps count, mean, variance, min and max
+def stats_grouper(results, key):
+    while True:
+        results[key] = yield from stats_averager()
+
+
+def main_stats(data, batch_size=4):
+    results = {}
+    for key, values in data.items():
+        group = stats_grouper(results, key)
+        next(group)
+        for start in range(0, len(values), batch_size):
+            group.send(values[start:start + batch_size])
+        group.send(None)
+    report_stats(results)
+    return results
+
+
+def report_stats(results):
+    for key, stats in sorted(results.items()):
+        group, unit = key.split(';')
+        print('{:2} {:5} averaging {:2f}{} stdev {:.3f} min {} max {}'.format(
+            stats.count, group, stats.mean, unit, stats.stdev, stats.minimum, stats.maximum))
+
+
+def _worker_stats(shard):
+    # Runs in a worker process: summarize one shard of {key: values}
+    return {key: Stats.of(values) for key, values in shard.items()}
+
+
 data = {
     'girls;kg':
         [40.9, 38.5, 44.3, 42.2, 41.7, 44.5, 38.0, 40.6, 44.5],
@@ -84,3 +117,38 @@ data = {
 }
 if __name__ == '__main__':
     main(data)
+    print("-" * 50)
+    main_stats(data)
+
+    # Shards summarized by separate workers, merged into one report
+    from concurrent import futures
+    shards = [{key: values[i::3] for key, values in data.items()} for i in range(3)]
+    with futures.ProcessPoolExecutor() as executor:
+        report_stats(merge_results(*executor.map(_worker_stats, shards)))
+
+    # Events/sec: one value per send() against one batch per send()
+    import random
+    import time
+
+    from coroutil import averager as value_averager, running_stats
+
+    events = [random.gauss(40, 3) for _ in range(1_000_000)]
+    coro = value_averager()
+    start = time.time()
+    for value in events:
+        coro.send(value)
+    end = time.time()
+    print(f"one value per send:      {len(events) / (end - start):12.0f} events/sec")
+    try:
+        import numpy as np
+        batches = np.array(events)
+    except ImportError:
+        batches = events
+    for batch_size in (100, 10_000):
+        coro = running_stats()
+        start = time.time()
+        for i in range(0, len(events), batch_size):
+            stats = coro.send(batches[i:i + batch_size])
+        end = time.time()
+        print(f"{batch_size:6} values per send: {len(events) / (end - start):12.0f} events/sec, "
+              f"mean {stats.mean:.3f} stdev {stats.stdev:.3f}")
@@ -1,4 +1,12 @@
+from collections import namedtuple
 from functools import wraps
+import math
+import numbers
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 def coroutine(func):
     """Decorator: primes 'func' by advancing to first yield"""
@@ -25,8 +33,105 @@ def averager():
         count += 1
         average = total / count
 
+
+class Stats(namedtuple('Stats', 'count mean m2 minimum maximum')):
+    """
+    Summary of a stream of values: count, mean, the sum of squared deviations
+    from the mean (m2), minimum and maximum. Two summaries merge exactly
+    (Chan et al.), so batches and workers can be summarized separately
+    """
+    __slots__ = ()
+
+    @classmethod
+    def empty(cls):
+        return cls(0, 0.0, 0.0, math.inf, -math.inf)
+
+    @classmethod
+    def of(cls, batch):
+        """
+        Summary of one batch: a list, an array or a single number
+        """
+        if isinstance(batch, numbers.Real):
+            return cls(1, float(batch), 0.0, float(batch), float(batch))
+        if np is not None:
+            values = np.asarray(batch, dtype=float)
+            if not values.size:
+                return cls.empty()
+            mean = values.mean()
+            deviations = values - mean
+            return cls(values.size, float(mean), float(deviations @ deviations),
+                       float(values.min()), float(values.max()))
+        if not len(batch):
+            return cls.empty()
+        # Two passes of fsum: Welford's one-pass update would cost a Python
+        # level step per value
+        mean = math.fsum(batch) / len(batch)
+        m2 = math.fsum((x - mean) ** 2 for x in batch)
+        return cls(len(batch), mean, m2, float(min(batch)), float(max(batch)))
+
+    def merge(self, other):
+        if not other.count:
+            return self
+        if not self.count:
+            return other
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        return Stats(count,
+                     self.mean + delta * other.count / count,
+                     self.m2 + other.m2 + delta * delta * self.count * other.count / count,
+                     min(self.minimum, other.minimum),
+                     max(self.maximum, other.maximum))
+
+    @property
+    def variance(self):
+        """
+        Population variance, as statistics.pvariance()
+        """
+        return self.m2 / self.count if self.count else math.nan
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+
+def stats_averager():
+    """
+    Subgenerator counterpart of averager() for batches: every send() takes a
+    list or array of values (or one value) and yields the Stats so far.
+    Sending None ends it and returns the final Stats, which makes it usable
+    with yield from; see running_stats() for a primed coroutine
+    """
+    stats = Stats.empty()
+    while True:
+        batch = yield stats
+        if batch is None:
+            break
+        stats = stats.merge(Stats.of(batch))
+    return stats
+
+
+@coroutine
+def running_stats():
+    return (yield from stats_averager())
+
+
+def merge_results(*results):
+    """
+    Merge {key: Stats} dicts, e.g. one from each worker, key by key
+    """
+    merged = {}
+    for result in results:
+        for key, stats in result.items():
+            merged[key] = merged.get(key, Stats.empty()).merge(stats)
+    return merged
+
+
 if __name__ == "__main__":
 
     coro_avg = averager()
     [print(coro_avg.send(n)) for n in range(0, 50, 5)]
+
+    coro_stats = running_stats()
+    coro_stats.send(range(0, 25, 5))
+    print(coro_stats.send([25, 30, 35, 40, 45]))
     coro_avg.send("Jules")
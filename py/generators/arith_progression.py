@@ -2,8 +2,19 @@
 # class example from 'Fluent Pyton'
 #
 
+from array import array
 from fractions import Fraction
 import itertools
+import math
+
+# NumPy is optional: to_array() and iter_chunks() fall back to array/list
+try:
+   import numpy as np
+except ImportError:
+   np = None
+
+# Terms per block when iter_chunks() is not told otherwise
+CHUNK_SIZE = 1 << 16
 
 
 class ArithmethicProgression:
@@ -30,10 +41,121 @@ class ArithmethicProgression:
          index += 1
          result = self.begin + self.step * index
 
+   def _term(self, index):
+      # The same value __iter__ yields at index, coerced type included
+      if index == 0:
+         return type(self.begin + self.step)(self.begin)
+      return self.begin + self.step * index
+
+   def _length(self):
+      """
+      Number of terms, None for an infinite series. Computed in O(1) and then
+      nudged so it agrees with the comparisons __iter__ makes, even when float
+      rounding puts (end - begin) / step right next to an integer
+      """
+      if self.end is None:
+         return None
+      if not self._term(0) < self.end:
+         return 0
+      if self.step <= 0:
+         return None
+      if all(isinstance(x, int) for x in (self.begin, self.step, self.end)):
+         return -((self.begin - self.end) // self.step)
+      n = max(math.ceil((self.end - self.begin) / self.step), 1)
+      while n > 1 and not self._term(n - 1) < self.end:
+         n -= 1
+      while self._term(n) < self.end:
+         n += 1
+      return n
+
+   def __len__(self):
+      n = self._length()
+      if n is None:
+         raise TypeError(f'infinite {type(self).__name__} has no len()')
+      return n
+
+   def __getitem__(self, index):
+      n = self._length()
+      if isinstance(index, slice):
+         if n is None:
+            raise TypeError(f'infinite {type(self).__name__} cannot be sliced')
+         return [self._term(i) for i in range(*index.indices(n))]
+      if index < 0 and n is not None:
+         index += n
+      if index < 0 or (n is not None and index >= n):
+         raise IndexError(f'{type(self).__name__} index out of range')
+      return self._term(index)
+
+   def __contains__(self, value):
+      n = self._length()
+      if self.step == 0:
+         return n != 0 and value == self._term(0)
+      try:
+         index = round((value - self.begin) / self.step)
+      except (TypeError, ValueError, OverflowError):
+         return False
+      return 0 <= index and (n is None or index < n) and self._term(index) == value
+
+   def _kind(self):
+      # 'q' or 'd' when NumPy/array can hold the terms exactly as __iter__
+      # computes them, None for exact types such as Fraction and Decimal. The
+      # terms have the type of begin + step, whatever the type of end
+      kind = type(self.begin + self.step)
+      if kind is int:
+         return 'q'
+      if kind is float:
+         return 'd'
+      return None
+
+   def _block(self, start, stop):
+      kind = self._kind()
+      if kind == 'q' and stop > start:
+         # Terms beyond 64 bits stay Python ints
+         if max(abs(self.begin), abs(self.step * (stop - 1)), abs(self._term(stop - 1))) >= 2 ** 63:
+            kind = None
+      if kind is None:
+         return [self._term(i) for i in range(start, stop)]
+      if np is None:
+         return array(kind, (self._term(i) for i in range(start, stop)))
+      # An int step multiplies the index in int64, exactly like Python ints
+      int_step = type(self.step) is int
+      if int_step and stop > start and abs(self.step * (stop - 1)) >= 2 ** 63:
+         return np.fromiter((self._term(i) for i in range(start, stop)), np.float64, stop - start)
+      # Same operations as __iter__: step * index, then + begin
+      block = self.begin + self.step * np.arange(start, stop, dtype=np.int64 if int_step else np.float64)
+      if start == 0 and stop > 0:
+         # The first term is begin coerced, not begin + step * 0 (-0.0 stays -0.0)
+         block[0] = self._term(0)
+      return block
+
+   def to_array(self):
+      """
+      All terms of a bounded progression at once: a NumPy array for int and
+      float terms (array('q')/array('d') without NumPy), a list for exact
+      types such as Fraction and Decimal
+      """
+      return self._block(0, len(self))
+
+   def iter_chunks(self, n=CHUNK_SIZE):
+      """
+      The terms in blocks of up to n, as to_array() would build them; an
+      infinite progression yields blocks forever
+      """
+      length = self._length()
+      for start in itertools.count(0, n):
+         stop = start + n if length is None else min(start + n, length)
+         if start >= stop:
+            break
+         yield self._block(start, stop)
+
 # Another way to achieve this. We can achieve the same effect with a generator function
 
 
-def arithprog_gen(begin, step, end=None):
+def arithprog_gen(begin, step, end=None, chunk=None):
+   # With chunk, yield blocks of terms as ArithmethicProgression.iter_chunks()
+   if chunk is not None:
+      yield from ArithmethicProgression(begin, step, end).iter_chunks(chunk)
+      return
    # Produce a result coerced type of the self.begin
    result = type(begin + step)(begin)
    # Set to True if this is going to be an infinte series
@@ -78,3 +200,28 @@ if __name__ == '__main__':
    print(list(artihprog_gen_iter_tools(0, 1, 3)))
    print(list(artihprog_gen_iter_tools(0, 1 / 3, 1)))
    print(list(artihprog_gen_iter_tools(0, Fraction(1, 3), 1)))
+   print("-" * 50)
+
+   # Random access and vectorized blocks
+   from decimal import Decimal
+   ap = ArithmethicProgression(0, 1 / 3, 1)
+   print(len(ap), ap[-1], 2 / 3 in ap, 0.5 in ap, ap[1:])
+   exact = ArithmethicProgression(Decimal('0.1'), Decimal('0.2'), 2)
+   print(len(exact), exact[4], Decimal('1.3') in exact, exact.to_array()[:3])
+   print(list(arithprog_gen(0, 1, 10, chunk=4)))
+
+   import time
+   grid = ArithmethicProgression(0.0, 1e-7, 1.0)
+   start = time.time()
+   values = list(grid)
+   end = time.time()
+   print(f"{len(values)} floats one at a time: {end - start:5.2f} s")
+   start = time.time()
+   block = grid.to_array()
+   end = time.time()
+   print(f"{len(block)} floats by to_array():  {end - start:5.2f} s")
+   start = time.time()
+   total = sum(len(chunk) for chunk in grid.iter_chunks(1 << 20))
+   end = time.time()
+   print(f"{total} floats by iter_chunks(): {end - start:5.2f} s")
+   assert list(block) == values
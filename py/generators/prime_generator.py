@@ -15,7 +15,26 @@ Summary:
 4. Generally, generator functions are better than iterators
 5. For simple cases, generator expressions are better than iterators
 
+
+The segmented sieve below streams primes in bounded memory: each segment
+covers SEGMENT_SIZE odd numbers in a bytearray (or NumPy bool array) and is
+sieved with the base primes up to its square root, so only one segment and
+the base primes are held at a time.
 """
+import itertools
+import math
+import os
+from array import array
+from collections import deque
+from concurrent import futures
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Odd numbers per segment
+SEGMENT_SIZE = 1 << 20
 
 
 def _is_prime(n):
@@ -35,6 +54,99 @@ def gen_primes(maximum):
             yield number
 
 
+def _base_primes(limit):
+    # Odd primes <= limit by a plain sieve of the odd numbers
+    if limit < 3:
+        return []
+    flags = bytearray([1]) * ((limit - 1) // 2)
+    # flags[i] stands for 2 * i + 3
+    for i in range((math.isqrt(limit) - 1) // 2):
+        if flags[i]:
+            p = 2 * i + 3
+            start = (p * p - 3) // 2
+            flags[start::p] = bytes(len(range(start, len(flags), p)))
+    return [2 * i + 3 for i in itertools.compress(range(len(flags)), flags)]
+
+
+def _sieve_segment(low, size, base=None):
+    """
+    Primes among the size odd numbers low + 1, low + 3, ... (low even), as an
+    array('Q') or a NumPy array. base holds the odd primes up to the square
+    root of the segment end; workers leave it None and sieve it themselves
+    """
+    high = low + 2 * size
+    if base is None:
+        base = _base_primes(math.isqrt(high))
+    flags = np.ones(size, dtype=bool) if np is not None else bytearray([1]) * size
+    for p in base:
+        if p * p >= high:
+            break
+        # First odd multiple of p in the segment, at least p * p
+        start = max(p * p, (low // p + 1) * p)
+        if start % 2 == 0:
+            start += p
+        i = (start - low - 1) // 2
+        if np is not None:
+            flags[i::p] = False
+        else:
+            flags[i::p] = bytes(len(range(i, size, p)))
+    if low == 0:
+        # 1 is not a prime
+        flags[0] = 0
+    if np is not None:
+        return np.flatnonzero(flags).astype(np.uint64) * 2 + (low + 1)
+    return array('Q', (low + 2 * i + 1 for i in itertools.compress(range(size), flags)))
+
+
+def prime_segments(maximum=None, segment_size=SEGMENT_SIZE, processes=0):
+    """
+    Primes <= maximum (forever if None), one array per segment. processes=0
+    sieves in this process; otherwise segments are sieved in a process pool,
+    a bounded number ahead of the consumer, and still come out in order
+    """
+    if maximum is not None and maximum < 2:
+        return
+    yield array('Q', [2])
+    lows = itertools.count(0, 2 * segment_size)
+    if maximum is not None:
+        lows = itertools.takewhile(lambda low: low < maximum, lows)
+
+    def size_of(low):
+        # The last segment stops at maximum
+        if maximum is None:
+            return segment_size
+        return min(segment_size, (maximum - low + 1) // 2)
+
+    if processes == 0:
+        base, base_limit = [], 0
+        for low in lows:
+            high = low + 2 * size_of(low)
+            if base_limit * base_limit < high:
+                # Grow the base primes geometrically as the segments climb
+                base_limit = max(math.isqrt(high) + 1, 2 * base_limit)
+                base = _base_primes(base_limit)
+            yield _sieve_segment(low, size_of(low), base)
+        return
+    with futures.ProcessPoolExecutor(processes) as executor:
+        pending = deque()
+        in_flight = 2 * (processes or os.cpu_count() or 1)
+        for low in lows:
+            pending.append(executor.submit(_sieve_segment, low, size_of(low)))
+            if len(pending) >= in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def sieve_primes(maximum=None, segment_size=SEGMENT_SIZE, processes=0):
+    """
+    Segmented Sieve of Eratosthenes: primes <= maximum, or all primes if
+    maximum is None, generated lazily
+    """
+    for segment in prime_segments(maximum, segment_size, processes):
+        yield from segment.tolist()
+
+
 if __name__ == '__main__':
     primes = gen_primes(25)
     print(primes)
@@ -65,3 +177,30 @@ if __name__ == '__main__':
     primes = [p for p in range(2, 25) if _is_prime(p)]
     for prime in primes:
         print(prime)
+
+    print("--" * 5)
+
+    # Use the segmented sieve, bounded and unbounded
+    print(list(sieve_primes(25)), list(itertools.islice(sieve_primes(), 10)))
+    import time
+
+    n = 200_000
+    start = time.time()
+    expected = list(gen_primes(n - 1))
+    end = time.time()
+    print(f"gen_primes below {n}:     {len(expected)} primes in {end - start:6.2f} s")
+    start = time.time()
+    assert list(sieve_primes(n - 1, segment_size=1 << 12)) == expected
+    end = time.time()
+    print(f"sieve_primes below {n}:   {len(expected)} primes in {end - start:6.2f} s")
+
+    n = 10 ** 8
+    for processes in (0, None):
+        start = time.time()
+        count = sum(len(segment) for segment in prime_segments(n - 1, processes=processes))
+        end = time.time()
+        print(f"prime_segments below 10^8, processes={processes}: {count} primes in {end - start:6.2f} s")
+    start = time.time()
+    count = sum(1 for _ in sieve_primes(n - 1))
+    end = time.time()
+    print(f"sieve_primes below 10^8, one by one: {count} primes in {end - start:6.2f} s")
@@ -2,6 +2,8 @@ import re
 import reprlib
 from typing import Pattern
 
+from tokenizer import tokenize
+
 RE_WORD: Pattern[str] = re.compile("\w+")
 
 
@@ -9,11 +11,24 @@ class GenSentence:
     def __init__(self, text):
         # No need to have a words list
         self.text = text
+        # tokenize() options when text is a file path or stream, see from_file()
+        self._chunked = None
+
+    @classmethod
+    def from_file(cls, source, **kwargs):
+        """
+        GenSentence over a file path or binary stream, tokenized chunk by chunk
+        """
+        sentence = cls(source)
+        sentence._chunked = kwargs
+        return sentence
 
     def __repr__(self):
-        return 'LazySentence(%s' % reprlib.repr(self.text)
+        return 'GenSentence(%s)' % reprlib.repr(self.text)
 
     def __iter__(self):
+        if self._chunked is not None:
+            return tokenize(self.text, **self._chunked)
         # build a generator expression over matches on RE_WORD on self.text, yielding generator expression
         return (match.group() for match in RE_WORD.finditer(self.text))
 
@@ -2,6 +2,8 @@ import re
 import reprlib
 from typing import Pattern
 
+from tokenizer import tokenize
+
 RE_WORD: Pattern[str] = re.compile("\w+")
 
 
@@ -11,6 +13,17 @@ class Sentence:
       self._words = RE_WORD.findall(text)
       print(id(self._words))
 
+   @classmethod
+   def from_file(cls, source, **kwargs):
+      """
+      Sentence over the words of a file path or binary stream, read in chunks
+      by tokenizer.tokenize() rather than as one string
+      """
+      sentence = cls('')
+      sentence._text = source
+      sentence._words = list(tokenize(source, **kwargs))
+      return sentence
+
    @property
    def text(self):
       return self._text
@@ -1,19 +1,121 @@
+import mmap
+import os
 import re
 import reprlib
 from typing import Pattern
 
+from tokenizer import tokenize
+
 RE_WORD: Pattern[str] = re.compile("\w+")
+# Over the raw bytes of a UTF-8 file every non-ASCII byte counts as a word
+# byte, so no UTF-8 sequence is ever cut. A run holding non-ASCII bytes may
+# also hold non-ASCII punctuation, so it is decoded and split with RE_WORD
+RE_BYTES_WORD: Pattern[bytes] = re.compile(rb"[\w\x80-\xff]+")
+# The runs of word bytes holding at least one non-ASCII byte
+RE_NON_ASCII_RUN: Pattern[bytes] = re.compile(rb"(?<![\w\x80-\xff])[\w\x80-\xff]*[\x80-\xff][\w\x80-\xff]*")
+# Maps word bytes to 1 and every other byte to 0, for word_count()
+WORD_BYTES = bytes(int(bool(RE_BYTES_WORD.match(bytes([b])))) for b in range(256))
+# Mapped bytes scanned between hints to the kernel to drop the pages behind
+RELEASE_EVERY = 8 * 2 ** 20
+# Bytes of the mapping copied and translated at a time by word_count()
+COUNT_CHUNK = 2 ** 20
 
 
 class LazySentence:
    def __init__(self, text):
       # No need to have a words list
       self.text = text
+      # tokenize() options when text is a file path or stream, see from_file()
+      self._chunked = None
+      # True when text is the path of a file to memory-map, see from_mmap()
+      self._mapped = False
+
+   @classmethod
+   def from_file(cls, source, **kwargs):
+      """
+      LazySentence over a file path or binary stream, tokenized chunk by chunk
+      """
+      sentence = cls(source)
+      sentence._chunked = kwargs
+      return sentence
+
+   @classmethod
+   def from_mmap(cls, path):
+      """
+      LazySentence over a memory-mapped file: RE_BYTES_WORD runs over the
+      mapping and only the matched runs are decoded. Pages already scanned
+      are released as iteration goes, so RSS stays flat on huge files
+      """
+      sentence = cls(path)
+      sentence._mapped = True
+      return sentence
+
+   def _open_map(self):
+      with open(self.text, 'rb') as fp:
+         if os.fstat(fp.fileno()).st_size == 0:
+            return None
+         return mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+   def _iter_mapped(self):
+      mapping = self._open_map()
+      if mapping is None:
+         return
+      with mapping:
+         released = 0
+         for match in RE_BYTES_WORD.finditer(mapping):
+            run = match.group()
+            if run.isascii():
+               yield run.decode('ascii')
+            else:
+               yield from RE_WORD.findall(run.decode('utf-8', 'replace'))
+            if match.end() - released > RELEASE_EVERY and hasattr(mapping, 'madvise'):
+               upto = match.end() - match.end() % mmap.PAGESIZE
+               mapping.madvise(mmap.MADV_DONTNEED, released, upto - released)
+               released = upto
+
+   def word_count(self):
+      """
+      Number of words. Not __len__, which list() would call as a length hint
+      before iterating. A mapped file is counted without match objects: the
+      bytes are translated to 0/1 word flags and the 0 to 1 steps counted,
+      then the runs holding non-ASCII bytes are recounted with RE_WORD
+      """
+      if not self._mapped:
+         return sum(1 for _ in self)
+      mapping = self._open_map()
+      if mapping is None:
+         return 0
+      with mapping:
+         words, start, released = 0, 0, 0
+         while start < len(mapping):
+            # Chunks end after a whole run of word bytes, so no run is split
+            end = start + COUNT_CHUNK
+            tail = RE_BYTES_WORD.match(mapping, end)
+            if tail:
+               end = tail.end()
+            chunk = mapping[start:end]
+            flags = chunk.translate(WORD_BYTES)
+            words += flags.count(b'\x00\x01') + (flags[0] == 1)
+            if not chunk.isascii():
+               words += sum(len(RE_WORD.findall(run.decode('utf-8', 'replace'))) - 1
+                            for run in RE_NON_ASCII_RUN.findall(chunk))
+            start = end
+            if start - released > RELEASE_EVERY and hasattr(mapping, 'madvise'):
+               upto = start - start % mmap.PAGESIZE
+               mapping.madvise(mmap.MADV_DONTNEED, released, upto - released)
+               released = upto
+      return words
 
    def __repr__(self):
-      return 'LazySentence(%s' % reprlib.repr(self.text)
+      return 'LazySentence(%s)' % reprlib.repr(self.text)
 
    def __iter__(self):
+      if self._mapped:
+         yield from self._iter_mapped()
+         return
+      if self._chunked is not None:
+         yield from tokenize(self.text, **self._chunked)
+         return
       # build an iterator over matches on RE_WORD on self.text, yielding MatchObject instance
       for match in RE_WORD.finditer(self.text):
          yield match.group()
@@ -24,3 +126,49 @@ if __name__ == '__main__':
    print(s)
    for w in s:
       print(w)
+
+   # Words/sec and peak RSS over a generated file, mapped against read whole
+   import resource
+   import sys
+   import tempfile
+   import time
+
+   # The corpus generator lives in a sibling directory of scripts, not in a package
+   sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'collections'))
+   from build_indexs import make_corpus, random_words
+
+   # The mapped paths must split non-ASCII punctuation like RE_WORD does
+   text = '“Hello,” she said — it’s naïve… foo—bar\n'
+   fd, path = tempfile.mkstemp(suffix='.txt')
+   with os.fdopen(fd, 'w', encoding='utf-8') as fp:
+      fp.write(text)
+   mapped = LazySentence.from_mmap(path)
+   assert list(mapped) == list(LazySentence(text)), list(mapped)
+   assert mapped.word_count() == len(RE_WORD.findall(text))
+   os.remove(path)
+
+   def peak_rss():
+      return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+   fd, path = tempfile.mkstemp(suffix='.log')
+   os.close(fd)
+   make_corpus(path, 400_000, vocabulary=random_words(20_000) + ['naïve', 'café'])
+   size = os.path.getsize(path) / 2 ** 20
+   print(f"{size:.0f} MB file, peak RSS before: {peak_rss():6.1f} MB")
+
+   # Peak RSS only grows, so the whole-string run goes last
+   mapped = LazySentence.from_mmap(path)
+   start = time.time()
+   words = sum(1 for _ in mapped)
+   end = time.time()
+   print(f"from_mmap iteration: {words / (end - start):10.0f} words/sec, peak RSS {peak_rss():6.1f} MB")
+   start = time.time()
+   assert mapped.word_count() == words
+   end = time.time()
+   print(f"from_mmap word_count:{words / (end - start):10.0f} words/sec, peak RSS {peak_rss():6.1f} MB")
+   start = time.time()
+   with open(path, encoding='utf-8') as fp:
+      assert sum(1 for _ in LazySentence(fp.read())) == words
+   end = time.time()
+   print(f"whole str iteration: {words / (end - start):10.0f} words/sec, peak RSS {peak_rss():6.1f} MB")
+   os.remove(path)
@@ -0,0 +1,359 @@
+#
+# Lazy, composable pipelines over the itertools building blocks shown in
+# iteratortools.py and zip_and_iterators.py:
+#
+#   Stream(range(10)).map(sqr).filter(is_odd).window(2).batch(3).accumulate()
+#
+# Every method returns a new Stream; nothing runs until it is iterated. A
+# chain of generators pays a frame switch per item per stage, so Stream fuses
+# the stages into a single generator instead: like collections.namedtuple,
+# it writes the source of one loop with a statement per stage and exec()s it.
+# batch() and parallel map() end a fused loop, as they regroup the items.
+#
+# With chunk=n every stage works on NumPy arrays of about n items: map()
+# and filter() get whole arrays (so their functions must be vectorized),
+# accumulate() takes a ufunc, window() yields read-only sliding views.
+#
+# map(func, processes=...) runs func in a process pool, a bounded number of
+# batches in flight, keeping the order of the items.
+
+import collections
+import itertools
+import operator
+import os
+from array import array
+from concurrent import futures
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Items per task sent to the process pool by a parallel map() in item mode
+MAP_CHUNKSIZE = 1024
+
+
+def _map_batch(func, items):
+    return [func(x) for x in items]
+
+
+def _parallel_map(source, func, processes, chunksize):
+    in_flight = 2 * (processes or os.cpu_count() or 1)
+    with futures.ProcessPoolExecutor(processes) as executor:
+        pending = collections.deque()
+        source = iter(source)
+        while True:
+            items = list(itertools.islice(source, chunksize))
+            if items:
+                pending.append(executor.submit(_map_batch, func, items))
+            if pending and (len(pending) >= in_flight or not items):
+                yield from pending.popleft().result()
+            elif not items:
+                return
+
+
+def _size(n):
+    # Sizes of window() and batch(): ints of at least 1, TypeError otherwise
+    n = operator.index(n)
+    if n < 1:
+        raise ValueError('n must be at least 1')
+    return n
+
+
+def _fuse(stages):
+    """
+    One generator function running the per-item stages in a single loop,
+    ending with an optional batch stage
+    """
+    namespace = {'deque': collections.deque}
+    setup, body, tail = [], [], []
+    for i, (kind, arg) in enumerate(stages):
+        if kind == 'map':
+            namespace[f'f{i}'] = arg
+            body += [f'x = f{i}(x)']
+        elif kind == 'filter':
+            namespace[f'f{i}'] = arg
+            body += [f'if not f{i}(x):', '    continue']
+        elif kind == 'accumulate':
+            namespace[f'f{i}'] = arg
+            setup += [f'a{i} = started{i} = None']
+            body += [f'if started{i}:',
+                     f'    x = a{i} = f{i}(a{i}, x)',
+                     'else:',
+                     f'    a{i}, started{i} = x, True']
+        elif kind == 'window':
+            namespace[f'n{i}'] = arg
+            setup += [f'w{i} = deque(maxlen=n{i})']
+            body += [f'w{i}.append(x)',
+                     f'if len(w{i}) < n{i}:',
+                     '    continue',
+                     f'x = tuple(w{i})']
+        elif kind == 'batch':
+            namespace[f'n{i}'] = arg
+            setup += ['b = []']
+            body += ['b.append(x)',
+                     f'if len(b) < n{i}:',
+                     '    continue',
+                     'x = tuple(b)',
+                     'b.clear()']
+            tail += ['if b:', '    yield tuple(b)']
+    lines = ['def fused(source):']
+    lines += ['    ' + line for line in setup]
+    lines += ['    for x in source:']
+    lines += ['        ' + line for line in body + ['yield x']]
+    lines += ['    ' + line for line in tail]
+    exec('\n'.join(lines), namespace)
+    return namespace['fused']
+
+
+def _row_objects(chunk):
+    # 1-D object array holding the rows of chunk, whatever their shapes
+    rows = np.empty(len(chunk), dtype=object)
+    for i, row in enumerate(chunk):
+        rows[i] = row
+    return rows
+
+
+class Stream:
+    """
+    Lazy pipeline of map, filter, window, batch and accumulate stages
+    """
+
+    def __init__(self, source, chunk=None):
+        if chunk is not None and np is None:
+            raise ImportError('Stream(chunk=...) needs NumPy')
+        self._source = source
+        self._chunk = chunk
+        self._stages = ()
+
+    def _then(self, kind, arg):
+        stream = type(self).__new__(type(self))
+        stream._source, stream._chunk = self._source, self._chunk
+        stream._stages = self._stages + ((kind, arg),)
+        return stream
+
+    def map(self, func, processes=0, chunksize=MAP_CHUNKSIZE):
+        """
+        func applied to every item (to every array with chunk). processes=0
+        runs it in this process, None on one worker per CPU
+        """
+        if processes == 0:
+            return self._then('map', func)
+        return self._then('pmap', (func, processes, chunksize))
+
+    def filter(self, predicate):
+        return self._then('filter', predicate)
+
+    def window(self, n):
+        """
+        Overlapping windows of n consecutive items, as tuples (as rows of a
+        read-only 2-D view with chunk)
+        """
+        return self._then('window', _size(n))
+
+    def batch(self, n):
+        """
+        Non-overlapping tuples of n items, the last one possibly shorter (rows
+        of a 2-D array with chunk, the short last one in a block of its own,
+        which to_array() refuses to stack)
+        """
+        return self._then('batch', _size(n))
+
+    def accumulate(self, func=operator.add):
+        """
+        Running totals like itertools.accumulate(); with chunk func must be
+        an associative ufunc, or operator.add, operator.mul, max, min
+        """
+        return self._then('accumulate', func)
+
+    # -- item mode --------------------------------------------------------
+    def _iter_items(self):
+        it = iter(self._source)
+        run = []
+        for kind, arg in self._stages:
+            if kind == 'pmap':
+                if run:
+                    it = _fuse(run)(it)
+                    run = []
+                it = _parallel_map(it, *arg)
+                continue
+            run.append((kind, arg))
+            if kind == 'batch':
+                it = _fuse(run)(it)
+                run = []
+        return _fuse(run)(it) if run else it
+
+    # -- chunk mode -------------------------------------------------------
+    def _source_chunks(self):
+        n = self._chunk
+        source = self._source
+        if isinstance(source, range):
+            # Generated chunk by chunk, never the whole range at once
+            for start in range(0, len(source), n):
+                part = source[start:start + n]
+                yield np.arange(part.start, part.stop, part.step)
+            return
+        if isinstance(source, (np.ndarray, array, memoryview)):
+            # Sliced as views, no copy of array-backed sources
+            values = np.asarray(source)
+            for start in range(0, len(values), n):
+                yield values[start:start + n]
+            return
+        it = iter(source)
+        while True:
+            chunk = np.array(list(itertools.islice(it, n)))
+            if not len(chunk):
+                return
+            yield chunk
+
+    def chunks(self):
+        """
+        The arrays flowing out of the last stage of a chunked Stream
+        """
+        if self._chunk is None:
+            raise TypeError('chunks() needs a Stream built with chunk=...')
+        chunks = self._source_chunks()
+        for kind, arg in self._stages:
+            chunks = getattr(self, '_chunk_' + kind)(chunks, arg)
+        return (chunk for chunk in chunks if len(chunk))
+
+    @staticmethod
+    def _chunk_map(chunks, func):
+        return (np.asarray(func(chunk)) for chunk in chunks)
+
+    @staticmethod
+    def _chunk_pmap(chunks, arg):
+        func, processes, _ = arg
+        # Every chunk is one task
+        batches = _parallel_map(chunks, func, processes, 1)
+        return (np.asarray(chunk) for chunk in batches)
+
+    @staticmethod
+    def _chunk_filter(chunks, predicate):
+        return (chunk[np.asarray(predicate(chunk), dtype=bool)] for chunk in chunks)
+
+    @staticmethod
+    def _chunk_accumulate(chunks, func):
+        ufunc = {operator.add: np.add, operator.mul: np.multiply,
+                 max: np.maximum, min: np.minimum}.get(func, func)
+        if not hasattr(ufunc, 'accumulate'):
+            raise TypeError(f'{func!r} is not a ufunc, cannot accumulate chunks')
+        carry = None
+        for chunk in chunks:
+            if not len(chunk):
+                continue
+            out = ufunc.accumulate(chunk)
+            if carry is not None:
+                # Associative, so the earlier total folds in elementwise
+                out = ufunc(carry, out)
+            carry = out[-1]
+            yield out
+
+    @staticmethod
+    def _chunk_window(chunks, n):
+        carry = None
+        for chunk in chunks:
+            if carry is not None:
+                if carry.shape[1:] != chunk.shape[1:]:
+                    # The short last batch: window the rows as objects
+                    carry, chunk = _row_objects(carry), _row_objects(chunk)
+                chunk = np.concatenate([carry, chunk])
+            if len(chunk) < n:
+                carry = chunk
+                continue
+            carry = chunk[len(chunk) - n + 1:]
+            # Windows over the first axis only, so rows of an earlier batch()
+            # are windowed whole; the window axis goes right after the rows
+            windows = np.lib.stride_tricks.sliding_window_view(chunk, n, axis=0)
+            yield np.moveaxis(windows, -1, 1)
+
+    @staticmethod
+    def _chunk_batch(chunks, n):
+        pending = []
+        size = 0
+        for chunk in chunks:
+            pending.append(chunk)
+            size += len(chunk)
+            if size >= n:
+                joined = np.concatenate(pending)
+                whole = size - size % n
+                yield joined[:whole].reshape(-1, n, *joined.shape[1:])
+                pending, size = [joined[whole:]], size % n
+        if size:
+            # A (1, size) block: later stages still get an array
+            yield np.concatenate(pending)[None]
+
+    # -- consumers --------------------------------------------------------
+    def __iter__(self):
+        if self._chunk is None:
+            return self._iter_items()
+        return (item for chunk in self.chunks()
+                for item in (chunk.tolist() if isinstance(chunk, np.ndarray) and chunk.ndim == 1
+                             else chunk))
+
+    def to_list(self):
+        return list(self)
+
+    def to_array(self):
+        """
+        Every item in one NumPy array
+        """
+        if self._chunk is None:
+            return np.array(self.to_list())
+        chunks = list(self.chunks())
+        if any(chunk.shape[1:] != chunks[0].shape[1:] for chunk in chunks):
+            raise ValueError('the last batch is shorter than the others, '
+                             'use chunks() or to_list() instead of to_array()')
+        return np.concatenate(chunks)
+
+    def __repr__(self):
+        stages = ''.join(f'.{kind}()' for kind, _ in self._stages)
+        return f'{type(self).__name__}({type(self._source).__name__}){stages}'
+
+
+def sqr(n):
+    return n ** 2
+
+
+def is_odd(n):
+    return n % 2 == 1
+
+
+def slow_sqr(n):
+    # Enough work per item for a process pool to pay off
+    return sum(i * i for i in range(200)) + n * n
+
+
+if __name__ == '__main__':
+    import time
+
+    print(Stream(range(10)).map(sqr).filter(is_odd).to_list())
+    print(Stream(range(6)).window(3).to_list(), Stream(range(7)).batch(3).to_list())
+    print(Stream(range(1, 6)).accumulate(operator.mul).to_list())
+    if np is not None:
+        print(Stream(range(10), chunk=4).map(lambda a: a * a).window(2).batch(3).to_list())
+
+    n = 2_000_000
+
+    def naive():
+        squares = (sqr(x) for x in range(n))
+        odd = (x for x in squares if is_odd(x))
+        return itertools.accumulate(odd)
+
+    pipelines = (('generator chain', naive),
+                 ('Stream', lambda: Stream(range(n)).map(sqr).filter(is_odd).accumulate()),
+                 ('Stream, chunked', lambda: Stream(np.arange(n), chunk=1 << 16)
+                  .map(lambda a: a * a).filter(lambda a: a % 2 == 1).accumulate().chunks()))
+    for label, pipeline in pipelines if np is not None else pipelines[:2]:
+        start = time.time()
+        total = collections.deque(pipeline(), maxlen=1)[0]
+        end = time.time()
+        total = total[-1] if np is not None and isinstance(total, np.ndarray) else total
+        print(f"{label:>16}: {n / (end - start):10.0f} items/sec, last total {total}")
+
+    n = 50_000
+    for processes in (0, None):
+        start = time.time()
+        total = sum(Stream(range(n)).map(slow_sqr, processes=processes))
+        end = time.time()
+        print(f"map(slow_sqr, processes={processes}): {n / (end - start):8.0f} items/sec")
@@ -0,0 +1,131 @@
+#
+# Word tokenizer for files too big to hold in one string, behind the
+# Sentence, LazySentence and GenSentence classes of this directory.
+#
+# The source is read in fixed-size chunks and decoded incrementally. A chunk
+# is cut just before its trailing, possibly unfinished word, which is carried
+# over to the next chunk, so no word is ever split and RE_WORD finds exactly
+# the words it would find in the whole text. Memory stays at a few chunks
+# however big the file is. With processes, chunks are tokenized in a process
+# pool, a bounded number of them in flight, and the words still come out in
+# file order.
+
+import codecs
+import collections
+import os
+import re
+from concurrent import futures
+from typing import Pattern
+
+RE_WORD: Pattern[str] = re.compile(r"\w+")
+# The word touching the end of a chunk, possibly empty
+RE_TRAILING_WORD: Pattern[str] = re.compile(r"\w*\Z")
+CHUNK_SIZE = 1 << 20
+
+
+def _read_chunks(fp, chunk_size, encoding):
+   decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+   while True:
+      block = fp.read(chunk_size)
+      if not block:
+         break
+      # Text streams are accepted too, they need no decoding
+      yield decoder.decode(block) if isinstance(block, bytes) else block
+   if isinstance(block, bytes):
+      yield decoder.decode(b'', final=True)
+
+
+def iter_chunks(source, chunk_size=CHUNK_SIZE, encoding='utf-8'):
+   """
+   Text of a file path or stream in chunks of about chunk_size that never
+   end inside a word
+   """
+   if isinstance(source, (str, bytes, os.PathLike)):
+      with open(source, 'rb') as fp:
+         yield from iter_chunks(fp, chunk_size, encoding)
+      return
+   # Pieces of the unfinished word, joined once it ends: only the new text
+   # is scanned, so a very long word costs no more than a short one
+   carry = []
+   for text in _read_chunks(source, chunk_size, encoding):
+      cut = RE_TRAILING_WORD.search(text).start()
+      if cut == 0:
+         if text:
+            carry.append(text)
+         continue
+      carry.append(text[:cut])
+      yield ''.join(carry)
+      carry = [text[cut:]] if cut < len(text) else []
+   if carry:
+      yield ''.join(carry)
+
+
+def _find_words(chunk):
+   return RE_WORD.findall(chunk)
+
+
+def tokenize(source, chunk_size=CHUNK_SIZE, processes=0, encoding='utf-8'):
+   """
+   Words of a file path or stream, in order. processes=0 tokenizes in this
+   process, None uses one worker per CPU
+   """
+   chunks = iter_chunks(source, chunk_size, encoding)
+   if processes == 0:
+      for chunk in chunks:
+         for match in RE_WORD.finditer(chunk):
+            yield match.group()
+      return
+   in_flight = 2 * (processes or os.cpu_count() or 1)
+   with futures.ProcessPoolExecutor(processes) as executor:
+      pending = collections.deque()
+      for chunk in chunks:
+         pending.append(executor.submit(_find_words, chunk))
+         if len(pending) >= in_flight:
+            yield from pending.popleft().result()
+      while pending:
+         yield from pending.popleft().result()
+
+
+if __name__ == '__main__':
+   import io
+   import sys
+   import tempfile
+   import time
+   import tracemalloc
+
+   from sentence_lazy import LazySentence
+
+   # The corpus generator lives in a sibling directory of scripts, not in a package
+   sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'collections'))
+   from build_indexs import make_corpus
+
+   text = '"The time has come," the Walrus said, "To talk of many things"'
+   assert list(tokenize(io.BytesIO(text.encode()), chunk_size=5)) == RE_WORD.findall(text)
+   print(list(tokenize(io.BytesIO('naïve café über'.encode()), chunk_size=3)))
+
+   fd, path = tempfile.mkstemp(suffix='.txt')
+   os.close(fd)
+   make_corpus(path, 200_000)
+   size = os.path.getsize(path) / 2 ** 20
+
+   def whole_string():
+      with open(path, encoding='utf-8') as fp:
+         return sum(1 for _ in LazySentence(fp.read()))
+
+   words = whole_string()
+   for label, count, traced in (('whole string', whole_string, True),
+                                ('chunked', lambda: sum(1 for _ in tokenize(path)), True),
+                                ('chunked, pool', lambda: sum(1 for _ in tokenize(path, processes=None)), False)):
+      start = time.time()
+      assert count() == words
+      end = time.time()
+      peak = ''
+      if traced:
+         # Peak of this process only, so not measured for the pool
+         tracemalloc.start()
+         count()
+         peak = f", peak {tracemalloc.get_traced_memory()[1] / 2 ** 20:5.1f} MB"
+         tracemalloc.stop()
+      print(f"{label + ':':15} {words / (end - start):10.0f} words/sec{peak}")
+   print(f"{words} words, {size:.0f} MB file")
+   os.remove(path)
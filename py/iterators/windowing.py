@@ -0,0 +1,149 @@
+#
+# Sliding windows and fixed-size batches over any iterable.
+#
+# For a plain iterable a window is kept in a collections.deque(maxlen=n) that
+# is reused from one window to the next, so moving the window by step costs
+# step appends instead of rebuilding a list of n items. Each window or batch
+# is handed out as a tuple.
+#
+# Inputs backed by a 1-D buffer (array.array, bytes, memoryview, a NumPy
+# array, or anything with __buffer__ such as pyobjects/vector.py's Vector)
+# are not iterated at all: windows and batches are read-only slices of the
+# buffer, so nothing is copied however big n is.
+
+import collections
+import itertools
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def buffer_view(obj):
+    """
+    Read-only 1-D view of the buffer behind obj, or None if it has none
+    """
+    if np is not None and isinstance(obj, np.ndarray):
+        view = obj.view()
+        view.flags.writeable = False
+        return view
+    try:
+        view = memoryview(obj)
+    except TypeError:
+        # Python < 3.12 does not call __buffer__ itself
+        buffer = getattr(type(obj), '__buffer__', None)
+        if buffer is None:
+            return None
+        view = memoryview(buffer(obj, 0))
+    if view.ndim != 1:
+        return None
+    return view.toreadonly()
+
+
+def windowed(iterable, n, step=1):
+    """
+    Windows of n consecutive items, starting every step items; a trailing
+    partial window is dropped
+    """
+    if n < 1 or step < 1:
+        raise ValueError('n and step must be at least 1')
+    view = buffer_view(iterable)
+    if view is not None:
+        for start in range(0, len(view) - n + 1, step):
+            yield view[start:start + n]
+        return
+    it = iter(iterable)
+    window = collections.deque(itertools.islice(it, n), maxlen=n)
+    if len(window) < n:
+        return
+    yield tuple(window)
+    if step == 1:
+        append = window.append
+        for x in it:
+            append(x)
+            yield tuple(window)
+    elif step < n:
+        # Bigger steps move whole runs: slicing the last window is cheaper
+        # than rebuilding a tuple from the deque item by item
+        window = tuple(window)
+        while True:
+            fresh = tuple(itertools.islice(it, step))
+            if len(fresh) < step:
+                return
+            window = window[step:] + fresh
+            yield window
+    else:
+        while True:
+            # Skip the items between two windows, then refill
+            collections.deque(itertools.islice(it, step - n), maxlen=0)
+            window.clear()
+            window.extend(itertools.islice(it, n))
+            if len(window) < n:
+                return
+            yield tuple(window)
+
+
+def batched(iterable, n):
+    """
+    Consecutive batches of n items, the last one possibly shorter
+    """
+    if n < 1:
+        raise ValueError('n must be at least 1')
+    view = buffer_view(iterable)
+    if view is not None:
+        for start in range(0, len(view), n):
+            yield view[start:start + n]
+        return
+    it = iter(iterable)
+    while True:
+        batch = tuple(itertools.islice(it, n))
+        if not batch:
+            return
+        yield batch
+
+
+
+if __name__ == '__main__':
+    import os
+    import sys
+    import time
+
+    # Vector lives in a sibling directory of scripts, not in a package
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pyobjects'))
+    from vector import Vector
+
+    def islice_windowed(iterable, n, step=1):
+        # The hand-rolled version, a new list for every window (step <= n)
+        it = iter(iterable)
+        window = list(itertools.islice(it, n))
+        while len(window) == n:
+            yield window
+            window = window[step:] + list(itertools.islice(it, step))
+
+    def islice_batched(iterable, n):
+        it = iter(iterable)
+        while True:
+            batch = list(itertools.islice(it, n))
+            if not batch:
+                return
+            yield batch
+
+    print(list(windowed('ABCDEFG', 3, 2)), list(batched(range(7), 3)))
+    vec = Vector(range(8))
+    print([w.tolist() for w in windowed(vec, 4, 2)], list(batched(vec, 3))[-1].readonly)
+
+    vec = Vector(range(1_000_000))
+    for n, step in ((4, 1), (64, 1), (64, 16)):
+        for label, source in (('generator', lambda: iter(vec)), ('Vector', lambda: vec)):
+            for name, windows in (('islice', islice_windowed), ('windowed', windowed)):
+                start = time.time()
+                count = sum(1 for _ in windows(source(), n, step))
+                end = time.time()
+                print(f"n={n:2} step={step:2} {label:>9} {name:>8}: {count / (end - start):10.0f} windows/sec")
+    for label, source in (('generator', lambda: iter(vec)), ('Vector', lambda: vec)):
+        for name, batches in (('islice', islice_batched), ('batched', batched)):
+            start = time.time()
+            count = sum(1 for _ in batches(source(), 256))
+            end = time.time()
+            print(f"n=256 {label:>9} {name:>8}: {count / (end - start):10.0f} batches/sec")
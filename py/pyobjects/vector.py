@@ -1,16 +1,32 @@
 from array import array
+from mmap import mmap as memory_map, ACCESS_READ
+import os
 import reprlib
 import math
 import numbers
+import bisect
 import functools
+import heapq
+import itertools
 import operator
 
+# NumPy is optional: when present, bulk arithmetic runs in C over a zero-copy
+# view of the array buffer; otherwise we fall back to the pure-Python code
+try:
+   import numpy as np
+except ImportError:
+   np = None
+
 # A Python class to illustrate a User-defined Sequence Type
 
 
 class Vector:
    typecode = 'd'
    short_names = 'xyzt'
+   # Vectors are immutable, so the hash is computed on first use and kept,
+   # but only for a Vector owning its array: a view over a borrowed buffer
+   # (a slice, frombytes(copy=False), a VectorBatch row) may see it change
+   _hash = None
 
    def __init__(self, components):
       '''
@@ -19,6 +35,50 @@ class Vector:
       # Protected components that holds array with Vector components
       self._components = array(self.typecode, components)
 
+   @classmethod
+   def _fromarray(cls, components):
+      '''
+      Alternative constructor that adopts an existing array without copying it
+      '''
+      vec = cls.__new__(cls)
+      vec._components = components
+      return vec
+
+   @classmethod
+   def _fromndarray(cls, ndarr):
+      '''
+      Build a Vector from a NumPy result with a single buffer copy
+      '''
+      components = array(cls.typecode)
+      # frombytes() reads the NumPy buffer in place; tobytes() would copy it first
+      components.frombytes(memoryview(np.ascontiguousarray(ndarr, dtype=cls.typecode)).cast('B'))
+      return cls._fromarray(components)
+
+   def _ndarray(self):
+      '''
+      Zero-copy NumPy view over the components buffer, or None without NumPy
+      '''
+      if np is None:
+         return None
+      # asarray, unlike frombuffer, also wraps strided slice views in place
+      return np.asarray(self._components)
+
+   def _contiguous(self):
+      '''
+      The components as a contiguous buffer. A strided slice view is
+      materialized into its own array the first time this is needed
+      '''
+      if not isinstance(self._components, array) and not self._components.c_contiguous:
+         self._components = array(self.typecode, self._components)
+      return self._components
+
+   def __buffer__(self, flags):
+      '''
+      Read-only buffer over the components: memoryview(vec) from Python 3.12,
+      vec.__buffer__(0) before that
+      '''
+      return memoryview(self._contiguous()).toreadonly()
+
    def __iter__(self):
       '''
       Make this an iterable
@@ -32,27 +92,136 @@ class Vector:
       '''
       Use reprlib.repr() to get a limited-length representation of self._components
       '''
-      components = reprlib.repr(self._components)
+      components = self._components
+      if not isinstance(components, array):
+         # A view over a shared buffer; only copy the few items reprlib shows
+         components = array(self.typecode, components[:6])
+      components = reprlib.repr(components)
       # Remove array('d', prefix and trailing ')'
-      components = components[components.find('['), :-1]
+      components = components[components.find('['):-1]
       return (f"Vector({components})")
 
    def __str__(self):
       return str(tuple(self))
 
    def __bytes__(self):
-      return (bytes([ord(self.typecode)]) + bytes(self._components))
+      # bytes + buffer copies the components once, without an intermediate bytes
+      return bytes([ord(self.typecode)]) + memoryview(self._contiguous()).cast('B')
+
+   def tofile(self, path):
+      '''
+      Write the __bytes__ layout straight to a file, without building it in memory
+      '''
+      with open(path, 'wb') as fp:
+         fp.write(bytes([ord(self.typecode)]))
+         fp.write(memoryview(self._contiguous()).cast('B'))
 
    def __eq__(self, other):
+      if isinstance(other, Vector):
+         if len(self) != len(other):
+            return False
+         # Different cached hashes can never be equal vectors
+         if self._hash is not None and other._hash is not None and self._hash != other._hash:
+            return False
+         # memoryview compares the two buffers in C with float semantics
+         return memoryview(self._components) == memoryview(other._components)
       return len(self) == len(other) and all(a == b for a, b in zip(self, other))
 
    def __hash__(self):
+      if self._hash is not None:
+         return self._hash
       hashes = map(hash, self._components)
-      return functools.reduce(operator.xor, hashes)
+      result = functools.reduce(operator.xor, hashes, 0)
+      if isinstance(self._components, array):
+         self._hash = result
+      return result
+
+   def __reduce__(self):
+      # Views over a memoryview or mmap cannot be pickled as they are; an
+      # owned copy of the components is
+      return type(self), (array(self.typecode, self._components),)
 
    def __abs__(self):
+      if np is not None:
+         return float(np.linalg.norm(self._ndarray()))
       return math.sqrt(sum(x *x for x in self))
 
+   def __add__(self, other):
+      '''
+      Elementwise sum; the shorter operand is padded with zeros
+      '''
+      try:
+         if np is not None and isinstance(other, Vector) and len(self) == len(other):
+            return self._fromndarray(self._ndarray() + other._ndarray())
+         pairs = itertools.zip_longest(self, other, fillvalue=0.0)
+         return Vector(a + b for a, b in pairs)
+      except TypeError:
+         return NotImplemented
+
+   def __radd__(self, other):
+      return self + other
+
+   def __sub__(self, other):
+      try:
+         if np is not None and isinstance(other, Vector) and len(self) == len(other):
+            return self._fromndarray(self._ndarray() - other._ndarray())
+         pairs = itertools.zip_longest(self, other, fillvalue=0.0)
+         return Vector(a - b for a, b in pairs)
+      except TypeError:
+         return NotImplemented
+
+   def __rsub__(self, other):
+      return -self + other
+
+   def __mul__(self, other):
+      '''
+      Multiply by a scalar, or elementwise by another Vector of the same length
+      '''
+      if isinstance(other, numbers.Real):
+         if np is not None:
+            return self._fromndarray(self._ndarray() * other)
+         return Vector(n * other for n in self)
+      if isinstance(other, Vector):
+         if len(self) != len(other):
+            raise ValueError('vectors must have the same length')
+         if np is not None:
+            return self._fromndarray(self._ndarray() * other._ndarray())
+         return Vector(a * b for a, b in zip(self, other))
+      return NotImplemented
+
+   def __rmul__(self, other):
+      return self * other
+
+   def __neg__(self):
+      return self * -1
+
+   def __truediv__(self, scalar):
+      if isinstance(scalar, numbers.Real):
+         return self * (1 / scalar)
+      return NotImplemented
+
+   def dot(self, other):
+      '''
+      Dot product with another Vector or iterable of numbers of the same length
+      '''
+      if isinstance(other, SparseVector):
+         # Only the non-zero components of other contribute
+         return other.dot(self)
+      if len(self) != len(other):
+         raise ValueError('vectors must have the same length')
+      if np is not None and isinstance(other, Vector):
+         return float(np.dot(self._ndarray(), other._ndarray()))
+      return sum(a * b for a, b in zip(self, other))
+
+   def __matmul__(self, other):
+      try:
+         return self.dot(other)
+      except TypeError:
+         return NotImplemented
+
+   def __rmatmul__(self, other):
+      return self @ other
+
    def __len__(self):
       return len(self._components)
 
@@ -61,8 +230,9 @@ class Vector:
       cls = type(self)
       # check in the index is of type slice
       if isinstance(index, slice):
-         # Delegate the to create another instance of class with slice
-         return cls(self._components[index])
+         # A view sharing our buffer; Vectors are immutable so nothing is
+         # copied until the view is serialized
+         return cls._fromarray(memoryview(self._components)[index])
       elif isinstance(index, numbers.Integral):
          return self._components[index]
       else:
@@ -71,6 +241,8 @@ class Vector:
          raise TypeError(msg.format(cls=cls))
 
    def __getattr__(self, name):
+      # Only reached for names that are not class attributes: the short names
+      # of Vector itself are properties (see _short_name_property below)
       cls = type(self)
       if len(name) == 1:
          # one of the shortname characters
@@ -78,12 +250,13 @@ class Vector:
          # is position within range
          if 0 <= pos < len(self._components):
             return self._components[pos]
-      msg = '{._name__!r} object has no attribute {!r}'
+      msg = '{.__name__!r} object has no attribute {!r}'
       raise AttributeError(msg.format(cls, name))
 
    def __setattr__(self, name, value):
-      cls = type(self)
+      # Most assignments are to private names; check the length first
       if len(name) == 1:
+         cls = type(self)
          if name in cls.short_names:
             error = 'readonly attribute {attr_name!r}'
          elif name.islower():
@@ -95,11 +268,385 @@ class Vector:
             raise AttributeError(msg)
       super().__setattr__(name, value)
 
+   @classmethod
+   def frombytes(cls, octets, copy=True):
+      '''
+      Alternative constructor from the __bytes__ layout. With copy=False the
+      Vector keeps a read-only memoryview over octets instead of its own array
+      '''
+      typecode = chr(octets[0])
+      memv = memoryview(octets)[1:].cast(typecode)
+      if typecode != cls.typecode:
+         return cls(memv)
+      if copy:
+         # A single buffer copy instead of converting item by item
+         components = array(cls.typecode)
+         components.frombytes(memoryview(octets)[1:])
+         return cls._fromarray(components)
+      return cls._fromarray(memv.toreadonly())
+
+   @classmethod
+   def from_file(cls, path, mmap=True):
+      '''
+      Load a file written by tofile() or bytes(). With mmap=True the components
+      are paged in from disk on demand rather than read into memory
+      '''
+      with open(path, 'rb') as fp:
+         if not mmap or os.fstat(fp.fileno()).st_size <= 1:
+            return cls.frombytes(fp.read())
+         # The mapping outlives the file object; the memoryview keeps it alive
+         mapping = memory_map(fp.fileno(), 0, access=ACCESS_READ)
+      return cls.frombytes(mapping, copy=False)
+
+
+def _short_name_property(name, pos):
+   '''
+   Read-only property indexing the buffer directly, so v.x never falls
+   through to __getattr__
+   '''
+   def getter(self):
+      try:
+         return self._components[pos]
+      except IndexError:
+         msg = '{.__name__!r} object has no attribute {!r}'
+         raise AttributeError(msg.format(type(self), name)) from None
+   return property(getter, doc=f'component {pos} of the vector')
+
+
+for _pos, _name in enumerate(Vector.short_names):
+   setattr(Vector, _name, _short_name_property(_name, _pos))
+del _pos, _name
+
+
+class VectorBatch:
+   """
+   Columnar container for many Vectors of the same dimension, stored
+   row after row in one contiguous array buffer
+   """
+   typecode = Vector.typecode
+
+   def __init__(self, vectors, dim=None):
+      '''
+      Constructor: pack an iterable of vectors (or iterables of numbers)
+      '''
+      components = array(self.typecode)
+      rows = 0
+      for vec in vectors:
+         before = len(components)
+         components.extend(array(self.typecode, vec))
+         width = len(components) - before
+         if dim is None:
+            dim = width
+         elif width != dim:
+            raise ValueError(f'row {rows} has {width} components, expected {dim}')
+         rows += 1
+      if dim is None:
+         raise ValueError('cannot infer the dimension of an empty batch')
+      self._components = components
+      self._dim = dim
+
+   @classmethod
+   def fromarray(cls, components, dim):
+      '''
+      Adopt a flat buffer of len(components) // dim rows without copying it.
+      The rows are views over it, so their hashes are never cached
+      '''
+      if dim <= 0 or len(components) % dim:
+         raise ValueError(f'buffer of {len(components)} items is not a multiple of {dim}')
+      batch = cls.__new__(cls)
+      batch._components = components
+      batch._dim = dim
+      return batch
+
+   @property
+   def dim(self):
+      return self._dim
+
+   def __len__(self):
+      return len(self._components) // self._dim
+
+   def __repr__(self):
+      return f'{type(self).__name__}(<{len(self)} x {self._dim}>)'
+
+   def _row(self, i):
+      start = i * self._dim
+      return memoryview(self._components)[start:start + self._dim]
+
+   def __getitem__(self, index):
+      cls = type(self)
+      if isinstance(index, slice):
+         start, stop, step = index.indices(len(self))
+         if step != 1:
+            raise ValueError(f'{cls.__name__} slices must be contiguous')
+         view = memoryview(self._components)[start * self._dim:max(start, stop) * self._dim]
+         return cls.fromarray(view, self._dim)
+      elif isinstance(index, numbers.Integral):
+         rows = len(self)
+         if not -rows <= index < rows:
+            raise IndexError(f'{cls.__name__} index out of range')
+         # The Vector shares the batch buffer, no components are copied
+         return Vector._fromarray(self._row(index % rows))
+      else:
+         msg = "{cls.__name__} indices must be integers or slices"
+         raise TypeError(msg.format(cls=cls))
+
+   def __iter__(self):
+      return (self[i] for i in range(len(self)))
+
+   def _ndarray(self):
+      '''
+      Zero-copy (rows, dim) NumPy view over the buffer, or None without NumPy
+      '''
+      if np is None:
+         return None
+      return np.frombuffer(self._components, dtype=self.typecode).reshape(-1, self._dim)
+
+   def norms(self):
+      '''
+      abs() of every row, as an array
+      '''
+      if np is not None:
+         return array(self.typecode, np.linalg.norm(self._ndarray(), axis=1).tobytes())
+      return array(self.typecode,
+                   (math.sqrt(sum(x * x for x in self._row(i))) for i in range(len(self))))
+
+   def hashes(self):
+      '''
+      hash() of every row, equal to hash(self[i]) but without building Vectors
+      '''
+      return [functools.reduce(operator.xor, map(hash, self._row(i)), 0)
+              for i in range(len(self))]
+
+   def distances(self, query):
+      '''
+      Euclidean distance from query to every row, as an array
+      '''
+      if len(query) != self._dim:
+         raise ValueError(f'query has {len(query)} components, expected {self._dim}')
+      if np is not None:
+         diff = self._ndarray() - np.asarray(query, dtype=self.typecode)
+         return array(self.typecode, np.sqrt(np.einsum('ij,ij->i', diff, diff)).tobytes())
+      query = tuple(query)
+      return array(self.typecode,
+                   (math.sqrt(sum((a - b) ** 2 for a, b in zip(self._row(i), query)))
+                    for i in range(len(self))))
+
+   def pairwise_distances(self, other):
+      '''
+      Distance matrix between the rows of self and the rows of other, returned
+      as a VectorBatch with len(self) rows of len(other) distances
+      '''
+      if other.dim != self._dim:
+         raise ValueError(f'dimension mismatch: {self._dim} != {other.dim}')
+      if np is not None:
+         a, b = self._ndarray(), other._ndarray()
+         # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b, done as one matrix product
+         sq = (np.einsum('ij,ij->i', a, a)[:, None] + np.einsum('ij,ij->i', b, b)[None, :]
+               - 2.0 * (a @ b.T))
+         np.maximum(sq, 0.0, out=sq)
+         return type(self).fromarray(array(self.typecode, np.sqrt(sq).tobytes()), len(other))
+      components = array(self.typecode)
+      for i in range(len(self)):
+         components.extend(other.distances(self._row(i)))
+      return type(self).fromarray(components, len(other))
+
+   def nearest(self, query, k=1):
+      '''
+      The k rows closest to query, as a list of (row index, distance) pairs
+      '''
+      dists = self.distances(query)
+      k = min(k, len(dists))
+      if k <= 0:
+         return []
+      if np is not None:
+         d = np.frombuffer(dists, dtype=self.typecode)
+         idx = np.argpartition(d, k - 1)[:k]
+         idx = idx[np.argsort(d[idx], kind='stable')]
+         return [(int(i), float(d[i])) for i in idx]
+      return heapq.nsmallest(k, enumerate(dists), key=operator.itemgetter(1))
+
+
+class SparseVector:
+   """
+   Vector of mostly zero components, stored as sorted arrays of the indices
+   and values of the non-zero components. Costs scale with the non-zero count
+   """
+   typecode = Vector.typecode
+   indexcode = 'Q'
+
+   def __init__(self, dim, items=()):
+      '''
+      Constructor: dimension plus a mapping or iterable of (index, value) pairs
+      '''
+      if isinstance(items, dict):
+         items = items.items()
+      pairs = sorted((int(i), float(v)) for i, v in items if v)
+      for pos, (i, _) in enumerate(pairs):
+         if not 0 <= i < dim:
+            raise IndexError(f'index {i} out of range for dimension {dim}')
+         if pos and pairs[pos - 1][0] == i:
+            raise ValueError(f'duplicate index {i}')
+      self._dim = dim
+      self._indices = array(self.indexcode, (i for i, _ in pairs))
+      self._values = array(self.typecode, (v for _, v in pairs))
+      self._hash = None
+
+   @classmethod
+   def _fromarrays(cls, dim, indices, values):
+      '''
+      Adopt already sorted, zero-free index and value arrays without checks
+      '''
+      vec = cls.__new__(cls)
+      vec._dim = dim
+      vec._indices = indices
+      vec._values = values
+      vec._hash = None
+      return vec
+
+   @classmethod
+   def fromdense(cls, components):
+      return cls(len(components), ((i, v) for i, v in enumerate(components) if v))
+
+   def todense(self):
+      components = array(self.typecode, bytes(self._dim * array(self.typecode).itemsize))
+      for i, v in zip(self._indices, self._values):
+         components[i] = v
+      return Vector._fromarray(components)
+
+   @property
+   def nnz(self):
+      return len(self._values)
+
+   def items(self):
+      '''
+      (index, value) pairs of the non-zero components, in index order
+      '''
+      return zip(self._indices, self._values)
+
+   def __len__(self):
+      return self._dim
+
+   def __iter__(self):
+      # Dense iteration, for interoperability with Vector
+      nonzero = dict(self.items())
+      return (nonzero.get(i, 0.0) for i in range(self._dim))
+
+   def __repr__(self):
+      # reprlib shows at most 4 items, so never build more than 5
+      items = reprlib.repr(dict(itertools.islice(self.items(), 5)))
+      return f'{type(self).__name__}({self._dim}, {items})'
+
+   def __str__(self):
+      return str(tuple(self))
+
+   def __bool__(self):
+      return bool(self._values)
+
+   def __abs__(self):
+      if np is not None:
+         return float(np.linalg.norm(np.frombuffer(self._values, dtype=self.typecode)))
+      return math.sqrt(sum(x * x for x in self._values))
+
+   def __eq__(self, other):
+      if isinstance(other, SparseVector):
+         return (self._dim == other._dim and self._indices == other._indices
+                 and self._values == other._values)
+      return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+   def __hash__(self):
+      # Zeros hash to 0 and drop out of the xor, so this equals hash(self.todense())
+      if self._hash is None:
+         self._hash = functools.reduce(operator.xor, map(hash, self._values), 0)
+      return self._hash
+
+   def __getitem__(self, index):
+      cls = type(self)
+      if isinstance(index, slice):
+         window = range(*index.indices(self._dim))
+         if not window:
+            return cls._fromarrays(0, array(self.indexcode), array(self.typecode))
+         lo, hi = min(window[0], window[-1]), max(window[0], window[-1])
+         start = bisect.bisect_left(self._indices, lo)
+         stop = bisect.bisect_right(self._indices, hi)
+         pairs = [(window.index(i), v)
+                  for i, v in zip(self._indices[start:stop], self._values[start:stop])
+                  if i in window]
+         if window.step < 0:
+            pairs.reverse()
+         return cls._fromarrays(len(window),
+                                array(self.indexcode, (i for i, _ in pairs)),
+                                array(self.typecode, (v for _, v in pairs)))
+      elif isinstance(index, numbers.Integral):
+         if not -self._dim <= index < self._dim:
+            raise IndexError(f'{cls.__name__} index out of range')
+         index %= self._dim
+         pos = bisect.bisect_left(self._indices, index)
+         if pos < len(self._indices) and self._indices[pos] == index:
+            return self._values[pos]
+         return 0.0
+      else:
+         msg = "{cls.__name__} indices must be integers or slices"
+         raise TypeError(msg.format(cls=cls))
+
+   def dot(self, other):
+      '''
+      Dot product with a SparseVector (merge of the two index lists) or with
+      a dense Vector (gather at our non-zero indices)
+      '''
+      if len(self) != len(other):
+         raise ValueError('vectors must have the same length')
+      if isinstance(other, SparseVector):
+         if np is not None:
+            a_idx = np.frombuffer(self._indices, dtype=self.indexcode)
+            b_idx = np.frombuffer(other._indices, dtype=other.indexcode)
+            _, a_pos, b_pos = np.intersect1d(a_idx, b_idx, assume_unique=True, return_indices=True)
+            a_val = np.frombuffer(self._values, dtype=self.typecode)
+            b_val = np.frombuffer(other._values, dtype=other.typecode)
+            return float(np.dot(a_val[a_pos], b_val[b_pos]))
+         total, i, j = 0.0, 0, 0
+         a_idx, b_idx = self._indices, other._indices
+         while i < len(a_idx) and j < len(b_idx):
+            if a_idx[i] == b_idx[j]:
+               total += self._values[i] * other._values[j]
+               i += 1
+               j += 1
+            elif a_idx[i] < b_idx[j]:
+               i += 1
+            else:
+               j += 1
+         return total
+      if np is not None and isinstance(other, Vector):
+         idx = np.frombuffer(self._indices, dtype=self.indexcode)
+         return float(np.dot(np.frombuffer(self._values, dtype=self.typecode), other._ndarray()[idx]))
+      return sum(v * other[i] for i, v in self.items())
+
+   def __matmul__(self, other):
+      try:
+         return self.dot(other)
+      except TypeError:
+         return NotImplemented
+
+   def __rmatmul__(self, other):
+      return self @ other
+
+   def __bytes__(self):
+      '''
+      Value typecode, then dimension and non-zero count, then both arrays
+      '''
+      header = array(self.indexcode, [self._dim, self.nnz])
+      return (bytes([ord(self.typecode)]) + bytes(header)
+              + bytes(self._indices) + bytes(self._values))
+
    @classmethod
    def frombytes(cls, octets):
       typecode = chr(octets[0])
-      memv = memoryview(octets[1:]).cast(typecode)
-      return cls(memv)
+      memv = memoryview(octets)[1:]
+      width = array(cls.indexcode).itemsize
+      dim, nnz = memoryview(memv[:2 * width]).cast(cls.indexcode)
+      indices = array(cls.indexcode)
+      indices.frombytes(memv[2 * width:(2 + nnz) * width])
+      values = array(cls.typecode, memv[(2 + nnz) * width:].cast(typecode))
+      return cls._fromarrays(dim, indices, values)
 
 
 if __name__ == "__main__":
@@ -120,3 +667,87 @@ if __name__ == "__main__":
    print(v7.X)
    v2 = Vector((3,4,5))
    print(v == v2)
+
+   # Arithmetic runs through NumPy when it is installed
+   print('numpy backend:', np is not None)
+   print(v + v2, v * 2, 2 * v, v * v2, v @ v2, -v)
+
+   import time
+   big = Vector(range(1_000_000))
+   start = time.time()
+   for _ in range(10):
+      abs(big)
+   end = time.time()
+   print(f"abs() of a {len(big)} component Vector: {(end - start) / 10 * 1000:4.2f} ms")
+
+   # Short names are properties; compare with the __getattr__ fallback they replace
+   import timeit
+   v3 = Vector([3, 4, 5])
+   n = 1_000_000
+   fast = timeit.timeit('v3.x; v3.y', globals=globals(), number=n)
+   slow = timeit.timeit('getattr_x(v3, "x"); getattr_x(v3, "y")',
+                        globals={'v3': v3, 'getattr_x': Vector.__getattr__}, number=n)
+   print(f"v.x + v.y: {fast / n * 1e9:5.1f} ns property, {slow / n * 1e9:5.1f} ns __getattr__")
+   try:
+      v3.x = 1
+   except AttributeError as ex:
+      print(f"AttributeError: {ex}")
+
+   # Persist and reload without copying the components
+   import tempfile
+   path = os.path.join(tempfile.mkdtemp(), 'big.vec')
+   big.tofile(path)
+   start = time.time()
+   mapped = Vector.from_file(path)
+   end = time.time()
+   print(f"from_file(mmap=True) of {os.path.getsize(path)} bytes: {(end - start) * 1000:4.2f} ms",
+         mapped == big, Vector.frombytes(bytes(v), copy=False) == v)
+   del mapped
+   os.remove(path)
+
+   # Set insert/lookup with the original per-call hash and zip/all equality
+   class UncachedVector(Vector):
+      def __eq__(self, other):
+         return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+      def __hash__(self):
+         return functools.reduce(operator.xor, map(hash, self._components))
+
+   for cls in (UncachedVector, Vector):
+      keys = [cls(range(i, i + 10_000)) for i in range(200)]
+      start = time.time()
+      seen = set()
+      for _ in range(5):
+         seen.update(keys)
+         hits = sum(k in seen for k in keys)
+      end = time.time()
+      print(f"{cls.__name__}: {len(keys) * 10 / (end - start):10.0f} set inserts+lookups/sec")
+
+   # Many same-dimension vectors in one buffer
+   batch = VectorBatch([(3, 4), (6, 8), (1, 1), (0, 0)])
+   print(batch, batch[0], repr(batch[-1]), list(batch.norms()))
+   print(batch.hashes() == [hash(v) for v in batch])
+   print(batch.nearest((1, 2), k=2))
+   print(batch[:2].pairwise_distances(batch)[1])
+
+   # Sliding windows share the parent buffer instead of copying it
+   window, total = 512, 0.0
+   start = time.time()
+   for i in range(0, len(big) - window, window // 2):
+      total += abs(big[i:i + window])
+   end = time.time()
+   print(f"{len(big) // (window // 2)} sliding windows of {window}: {(end - start) * 1000:4.2f} ms",
+         v7[::-2], bytes(v7[::2]) == bytes(Vector([0, 2, 4, 6])))
+
+   # Mostly zero components
+   sv = SparseVector(1_000_000, {3: 1.0, 500_000: 2.0, 999_999: -2.0})
+   print(repr(sv), len(sv), sv[3], sv[4], repr(sv[499_999:500_001]), abs(sv))
+   print(sv == SparseVector.frombytes(bytes(sv)), sv @ sv, sv @ sv.todense(), len(bytes(sv)))
+   print(hash(sv) == hash(sv.todense()), sv[:10] == Vector([0, 0, 0, 1, 0, 0, 0, 0, 0, 0]))
+
+   import random
+   rows = VectorBatch(((random.random() for _ in range(64)) for _ in range(20_000)), dim=64)
+   start = time.time()
+   rows.nearest(rows[0], k=10)
+   end = time.time()
+   print(f"top-10 of {len(rows)} x {rows.dim} batch: {(end - start) * 1000:4.2f} ms")
@@ -1,5 +1,12 @@
 from array import array
 import math
+import numbers
+
+# NumPy is optional, as in vector.py
+try:
+   import numpy as np
+except ImportError:
+   np = None
 
 
 class Vector2D:
@@ -74,6 +81,169 @@ class Vector2D:
       return cls(*memv)
 
 
+class SlottedVector2D:
+   """
+   Vector2D with the same API but its two floats kept in __slots__, so
+   instances carry no per-instance __dict__
+   """
+   typecode = 'd'
+   __slots__ = ('__x', '__y')
+
+   def __init__(self, x, y):
+      self.__x = float(x)
+      self.__y = float(y)
+
+   @property
+   def x(self):
+      return self.__x
+
+   @property
+   def y(self):
+      return self.__y
+
+   def __iter__(self):
+      return (i for i in (self.x, self.y))
+
+   def __repr__(self):
+      class_name = type(self).__name__
+      return '{}({!r}, {!r})'.format(class_name, *self)
+
+   def __str__(self):
+      return str(tuple(self))
+
+   def __bytes__(self):
+      return (bytes([ord(self.typecode)]) +
+              bytes(array(self.typecode, self)))
+
+   def __hash__(self):
+      return hash(self.x) ^ hash(self.y)
+
+   def __eq__(self, other):
+      return tuple(self) == tuple(other)
+
+   def __abs__(self):
+      return math.hypot(self.x, self.y)
+
+   def __bool__(self):
+      return bool(abs(self))
+
+   def __format__(self, fmt_spec=''):
+      components = (format(c, fmt_spec) for c in self)
+      return ('({}, {})'.format(*components))
+
+   @classmethod
+   def frombytes(cls, octets):
+      tc = chr(octets[0])
+      memv = memoryview(octets[1:]).cast(tc)
+      return cls(*memv)
+
+
+class Vector2DArray:
+   """
+   Many 2-D points stored as interleaved doubles x0, y0, x1, y1, ... in one
+   array. Points are only materialized as objects when indexed
+   """
+   typecode = 'd'
+   point_class = SlottedVector2D
+
+   def __init__(self, points=()):
+      self._components = array(self.typecode)
+      for p in points:
+         self._components.extend(p)
+      if len(self._components) % 2:
+         raise ValueError('points must have exactly two components')
+
+   def append(self, point):
+      x, y = point
+      self._components.append(x)
+      self._components.append(y)
+
+   def __len__(self):
+      return len(self._components) // 2
+
+   def __repr__(self):
+      return f'{type(self).__name__}(<{len(self)} points>)'
+
+   def __getitem__(self, index):
+      cls = type(self)
+      if isinstance(index, slice):
+         start, stop, step = index.indices(len(self))
+         arr = cls()
+         if step == 1:
+            arr._components = self._components[2 * start:2 * max(start, stop)]
+         else:
+            for i in range(start, stop, step):
+               arr._components.extend(self._components[2 * i:2 * i + 2])
+         return arr
+      elif isinstance(index, numbers.Integral):
+         if index < 0:
+            index += len(self)
+         if not 0 <= index < len(self):
+            raise IndexError(f'{cls.__name__} index out of range')
+         return self.point_class(self._components[2 * index], self._components[2 * index + 1])
+      else:
+         msg = "{cls.__name__} indices must be integers or slices"
+         raise TypeError(msg.format(cls=cls))
+
+   def __iter__(self):
+      return (self[i] for i in range(len(self)))
+
+   def _xy(self):
+      '''
+      Zero-copy views of the x and y components
+      '''
+      memv = memoryview(self._components)
+      return memv[0::2], memv[1::2]
+
+   def norms(self):
+      '''
+      abs() of every point, as an array
+      '''
+      if np is not None:
+         xy = np.frombuffer(self._components, dtype=self.typecode).reshape(-1, 2)
+         return array(self.typecode, np.hypot(xy[:, 0], xy[:, 1]).tobytes())
+      return array(self.typecode, map(math.hypot, *self._xy()))
+
+   def hashes(self):
+      '''
+      hash() of every point, equal to hash(self[i]) without building points
+      '''
+      xs, ys = self._xy()
+      return [hx ^ hy for hx, hy in zip(map(hash, xs), map(hash, ys))]
+
+   def __bytes__(self):
+      return bytes([ord(self.typecode)]) + memoryview(self._components).cast('B')
+
+   @classmethod
+   def frombytes(cls, octets):
+      '''
+      Bulk constructor from the __bytes__ layout: one buffer copy for all points
+      '''
+      if chr(octets[0]) != cls.typecode:
+         raise ValueError(f'unsupported typecode {chr(octets[0])!r}')
+      arr = cls()
+      arr._components.frombytes(memoryview(octets)[1:])
+      if len(arr._components) % 2:
+         raise ValueError('buffer holds an odd number of components')
+      return arr
+
+   @classmethod
+   def fromrecords(cls, octets):
+      '''
+      Bulk constructor from concatenated Vector2D.__bytes__ records
+      '''
+      width = 1 + 2 * array(cls.typecode).itemsize
+      memv = memoryview(octets)
+      if len(memv) % width:
+         raise ValueError(f'buffer is not a whole number of {width} byte records')
+      arr = cls()
+      for start in range(0, len(memv), width):
+         if chr(memv[start]) != cls.typecode:
+            raise ValueError(f'unsupported typecode {chr(memv[start])!r}')
+         arr._components.frombytes(memv[start + 1:start + width])
+      return arr
+
+
 if __name__ == "__main__":
    v1 = Vector2D(3, 4)
    print(v1)
@@ -99,3 +269,22 @@ if __name__ == "__main__":
    vh_2 = Vector2D(3.1, 4.2)
    print((hash(vh_1), hash(vh_2)))
    print(set([vh_1, vh_2]))
+
+   # Memory per point for 100k points
+   import tracemalloc
+
+   def bytes_per_point(build, n=100_000):
+      tracemalloc.start()
+      points = build(n)
+      size, _ = tracemalloc.get_traced_memory()
+      tracemalloc.stop()
+      return size / n
+
+   print(f"Vector2D:        {bytes_per_point(lambda n: [Vector2D(i, i) for i in range(n)]):6.1f} bytes/point")
+   print(f"SlottedVector2D: {bytes_per_point(lambda n: [SlottedVector2D(i, i) for i in range(n)]):6.1f} bytes/point")
+   print(f"Vector2DArray:   {bytes_per_point(lambda n: Vector2DArray((i, i) for i in range(n))):6.1f} bytes/point")
+
+   points = Vector2DArray([(3, 4), (6, 8), (0, 0)])
+   print(points, points[1], list(points.norms()), points.hashes() == [hash(p) for p in points])
+   print(list(Vector2DArray.frombytes(bytes(points))) == list(points),
+         list(Vector2DArray.fromrecords(b''.join(bytes(Vector2D(*p)) for p in points))) == list(points))
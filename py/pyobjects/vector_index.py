@@ -0,0 +1,191 @@
+"""
+Nearest-neighbour search over collections of Vector or Vector2D instances.
+
+BruteForceIndex is exact for any dimension: with NumPy it scores a block of
+rows at a time with one matrix product, |q - x|^2 = |q|^2 + |x|^2 - 2 q.x.
+KDTree is a pure-Python k-d tree that pays off for low dimensions such as
+Vector2D points. build_index() picks one of them from the dimension.
+"""
+import heapq
+import math
+import operator
+
+from vector import Vector, VectorBatch, np
+
+
+class BruteForceIndex:
+   """
+   Exact k nearest neighbours by scanning every vector
+   """
+
+   def __init__(self, vectors, block_size=8192):
+      self._batch = vectors if isinstance(vectors, VectorBatch) else VectorBatch(vectors)
+      self.block_size = block_size
+      if np is not None:
+         data = self._batch._ndarray()
+         self._sq_norms = np.einsum('ij,ij->i', data, data)
+
+   @property
+   def dim(self):
+      return self._batch.dim
+
+   def __len__(self):
+      return len(self._batch)
+
+   def query(self, query, k=1):
+      '''
+      The k vectors closest to query, as a list of (position, distance) pairs
+      '''
+      return self.query_batch([query], k)[0]
+
+   def query_batch(self, queries, k=1):
+      '''
+      query() for many queries at once; one list of pairs per query
+      '''
+      if np is None:
+         return [self._batch.nearest(tuple(q), k) for q in queries]
+      qs = np.asarray([tuple(q) for q in queries], dtype=VectorBatch.typecode).reshape(-1, self.dim)
+      data = self._batch._ndarray()
+      k = min(k, len(data))
+      if k <= 0:
+         return [[] for _ in range(len(qs))]
+      q_sq = np.einsum('ij,ij->i', qs, qs)[:, None]
+      best_d = np.empty((len(qs), 0))
+      best_i = np.empty((len(qs), 0), dtype=np.intp)
+      for start in range(0, len(data), self.block_size):
+         block = data[start:start + self.block_size]
+         d2 = q_sq + self._sq_norms[None, start:start + len(block)] - 2.0 * (qs @ block.T)
+         # Merge this block's candidates with the running top k
+         cand_d = np.concatenate((best_d, d2), axis=1)
+         cand_i = np.concatenate((best_i, np.broadcast_to(np.arange(start, start + len(block)), d2.shape)),
+                                 axis=1)
+         keep = min(k, cand_d.shape[1])
+         part = np.argpartition(cand_d, keep - 1, axis=1)[:, :keep]
+         best_d = np.take_along_axis(cand_d, part, axis=1)
+         best_i = np.take_along_axis(cand_i, part, axis=1)
+      order = np.argsort(best_d, axis=1, kind='stable')
+      best_d = np.sqrt(np.maximum(np.take_along_axis(best_d, order, axis=1), 0.0))
+      best_i = np.take_along_axis(best_i, order, axis=1)
+      return [list(zip(map(int, row_i), map(float, row_d))) for row_i, row_d in zip(best_i, best_d)]
+
+
+class KDTree:
+   """
+   k-d tree for exact k nearest neighbours in low dimensions
+   """
+
+   def __init__(self, vectors, leaf_size=16):
+      self._points = [tuple(map(float, v)) for v in vectors]
+      if not self._points:
+         raise ValueError('cannot index an empty collection')
+      self._dim = len(self._points[0])
+      if any(len(p) != self._dim for p in self._points):
+         raise ValueError('all vectors must have the same dimension')
+      self.leaf_size = leaf_size
+      self._root = self._build(list(range(len(self._points))), 0)
+
+   @property
+   def dim(self):
+      return self._dim
+
+   def __len__(self):
+      return len(self._points)
+
+   def _build(self, positions, depth):
+      # A leaf is a list of positions, an inner node is (axis, split, left, right)
+      if len(positions) <= self.leaf_size:
+         return positions
+      axis = depth % self._dim
+      positions.sort(key=lambda i: self._points[i][axis])
+      mid = len(positions) // 2
+      split = self._points[positions[mid]][axis]
+      return (axis, split,
+              self._build(positions[:mid], depth + 1),
+              self._build(positions[mid:], depth + 1))
+
+   def query(self, query, k=1):
+      '''
+      The k vectors closest to query, as a list of (position, distance) pairs
+      '''
+      query = tuple(query)
+      if len(query) != self._dim:
+         raise ValueError(f'query has {len(query)} components, expected {self._dim}')
+      if k <= 0:
+         return []
+      points = self._points
+      # Max-heap of the best k so far, as (-squared distance, -position)
+      best = []
+      stack = [(0.0, self._root)]
+      while stack:
+         bound, node = stack.pop()
+         if len(best) == k and bound >= -best[0][0]:
+            continue
+         if isinstance(node, list):
+            for i in node:
+               d2 = sum((a - b) ** 2 for a, b in zip(points[i], query))
+               if len(best) < k:
+                  heapq.heappush(best, (-d2, -i))
+               elif d2 < -best[0][0]:
+                  heapq.heapreplace(best, (-d2, -i))
+            continue
+         axis, split, left, right = node
+         diff = query[axis] - split
+         near, far = (left, right) if diff < 0 else (right, left)
+         # Visit the near side first, the far side only if it can still win
+         stack.append((max(bound, diff * diff), far))
+         stack.append((bound, near))
+      result = sorted((-d2, -i) for d2, i in best)
+      return [(i, math.sqrt(d2)) for d2, i in result]
+
+   def query_batch(self, queries, k=1):
+      return [self.query(q, k) for q in queries]
+
+
+def build_index(vectors, max_kdtree_dim=3):
+   '''
+   A KDTree for low-dimensional vectors, otherwise a BruteForceIndex
+   '''
+   batch = vectors if isinstance(vectors, VectorBatch) else VectorBatch(vectors)
+   if batch.dim <= max_kdtree_dim:
+      return KDTree(batch)
+   return BruteForceIndex(batch)
+
+
+def naive_nearest(vectors, query, k=1):
+   '''
+   The Python loop the indexes replace: abs(a - b) against every vector
+   '''
+   dists = ((i, abs(v - query)) for i, v in enumerate(vectors))
+   return heapq.nsmallest(k, dists, key=operator.itemgetter(1))
+
+
+if __name__ == '__main__':
+   import random
+   import time
+
+   from vector2d import Vector2D
+
+   points = [Vector2D(random.uniform(-180, 180), random.uniform(-90, 90)) for _ in range(50_000)]
+   tree = build_index(points)
+   print(type(tree).__name__, tree.query(Vector2D(0, 0), k=3))
+
+   vectors = [Vector(random.random() for _ in range(64)) for _ in range(10_000)]
+   queries = vectors[:100]
+   index = build_index(vectors)
+   print(type(index).__name__, index.query(queries[0], k=3))
+   assert [i for i, _ in index.query(queries[1], k=5)] == [i for i, _ in naive_nearest(vectors, queries[1], k=5)]
+
+   def bench(label, func, queries):
+      start = time.time()
+      func(queries)
+      end = time.time()
+      print(f"{label:>28}: {len(queries) / (end - start):10.1f} queries/sec")
+
+   bench('naive loop, dim 64', lambda qs: [naive_nearest(vectors, q, 10) for q in qs], queries[:10])
+   bench('BruteForceIndex, dim 64', lambda qs: index.query_batch(qs, 10), queries)
+   queries_2d = points[:1000]
+   bench('naive loop, Vector2D',
+         lambda qs: [heapq.nsmallest(10, enumerate(points), key=lambda p: math.dist(p[1], q)) for q in qs],
+         queries_2d[:20])
+   bench('BruteForceIndex, Vector2D', lambda qs: BruteForceIndex(points).query_batch(qs, 10), queries_2d[:100])
+   bench('KDTree, Vector2D', lambda qs: tree.query_batch(qs, 10), queries_2d)
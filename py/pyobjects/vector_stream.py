@@ -0,0 +1,215 @@
+"""
+Framed container format for streams of Vector / Vector2D records.
+
+A file starts with a 24 byte header:
+
+    magic  b'VECS'
+    u8     format version
+    u8     typecode of the components ('d')
+    u32    dimension of every record, or 0 when records vary in length
+    u64    record count, or COUNT_UNKNOWN if the writer could not seek back
+
+Fixed-dimension files then hold the raw components of each record back to
+back, so record i starts at a computable offset and a memory-mapped file can
+be read without parsing. Variable-dimension files prefix every record with
+its u64 component count. All integers are little-endian.
+"""
+from array import array
+from mmap import mmap as memory_map, ACCESS_READ
+import os
+import struct
+
+from vector import Vector, VectorBatch
+
+MAGIC = b'VECS'
+VERSION = 1
+HEADER = struct.Struct('<4sBB2xI4xQ')
+LENGTH = struct.Struct('<Q')
+COUNT_UNKNOWN = 2 ** 64 - 1
+
+
+def _make(factory, components):
+   # Vectors adopt the components as they are, zero-copy views included
+   if isinstance(factory, type) and issubclass(factory, Vector):
+      return factory._fromarray(components)
+   return factory(*components)
+
+
+class VectorWriter:
+   """
+   Streaming writer; use as a context manager so the header count is patched
+   """
+   typecode = Vector.typecode
+
+   def __init__(self, fp, dim=None):
+      '''
+      fp is a binary file object, dim fixes the dimension of every record
+      '''
+      self._fp = fp
+      self.dim = dim
+      self.count = 0
+      self._start = fp.tell() if fp.seekable() else None
+      fp.write(HEADER.pack(MAGIC, VERSION, ord(self.typecode), dim or 0, COUNT_UNKNOWN))
+
+   def write(self, vector):
+      components = vector._contiguous() if isinstance(vector, Vector) else array(self.typecode, vector)
+      if self.dim is None:
+         self._fp.write(LENGTH.pack(len(components)))
+      elif len(components) != self.dim:
+         raise ValueError(f'record {self.count} has {len(components)} components, expected {self.dim}')
+      self._fp.write(memoryview(components).cast('B'))
+      self.count += 1
+
+   def writemany(self, vectors):
+      for vector in vectors:
+         self.write(vector)
+
+   def close(self):
+      if self._start is not None:
+         end = self._fp.tell()
+         self._fp.seek(self._start)
+         self._fp.write(HEADER.pack(MAGIC, VERSION, ord(self.typecode), self.dim or 0, self.count))
+         self._fp.seek(end)
+      self._fp.flush()
+
+   def __enter__(self):
+      return self
+
+   def __exit__(self, exc_type, exc_value, traceback):
+      self.close()
+
+
+def write_vectors(path, vectors, dim=None):
+   '''
+   Write every vector to path, returning the record count
+   '''
+   with open(path, 'wb') as fp, VectorWriter(fp, dim) as writer:
+      writer.writemany(vectors)
+   return writer.count
+
+
+def _read_header(octets):
+   magic, version, typecode, dim, count = HEADER.unpack(octets)
+   if magic != MAGIC:
+      raise ValueError(f'not a vector stream: magic {magic!r}')
+   if version != VERSION:
+      raise ValueError(f'unsupported vector stream version {version}')
+   return chr(typecode), dim, count
+
+
+def read_vectors(path, factory=Vector, mmap=True, chunk_records=4096):
+   '''
+   Lazily yield the records of path as factory instances. With mmap=True
+   Vectors are read-only views into the mapped file and nothing is copied
+   '''
+   with open(path, 'rb') as fp:
+      typecode, dim, count = _read_header(fp.read(HEADER.size))
+      if mmap and os.fstat(fp.fileno()).st_size > HEADER.size:
+         mapping = memory_map(fp.fileno(), 0, access=ACCESS_READ)
+      else:
+         mapping = None
+      if mapping is None:
+         yield from _read_stream(fp, typecode, dim, count, factory, chunk_records)
+         return
+   memv = memoryview(mapping).toreadonly()
+   width = array(typecode).itemsize
+   offset = HEADER.size
+   if dim:
+      records = (len(memv) - offset) // (dim * width)
+      if count != COUNT_UNKNOWN:
+         records = min(records, count)
+      components = memv[offset:offset + records * dim * width].cast(typecode)
+      for start in range(0, records * dim, dim):
+         yield _make(factory, components[start:start + dim])
+      return
+   seen = 0
+   while offset < len(memv) and seen != count:
+      (length,) = LENGTH.unpack_from(memv, offset)
+      offset += LENGTH.size
+      yield _make(factory, memv[offset:offset + length * width].cast(typecode))
+      offset += length * width
+      seen += 1
+
+
+def _read_stream(fp, typecode, dim, count, factory, chunk_records):
+   # Buffered path for files that cannot (or should not) be mapped
+   width = array(typecode).itemsize
+   remaining = count
+   while remaining:
+      if dim:
+         want = dim * width * (chunk_records if remaining == COUNT_UNKNOWN else min(chunk_records, remaining))
+         block = array(typecode)
+         block.frombytes(fp.read(want)[:want - want % (dim * width)])
+         if not block:
+            return
+         for start in range(0, len(block), dim):
+            yield _make(factory, block[start:start + dim])
+         produced = len(block) // dim
+      else:
+         prefix = fp.read(LENGTH.size)
+         if len(prefix) < LENGTH.size:
+            return
+         (length,) = LENGTH.unpack(prefix)
+         components = array(typecode)
+         components.frombytes(fp.read(length * width))
+         yield _make(factory, components)
+         produced = 1
+      if remaining != COUNT_UNKNOWN:
+         remaining -= produced
+
+
+def read_batch(path):
+   '''
+   Map a fixed-dimension file as one VectorBatch without copying it
+   '''
+   with open(path, 'rb') as fp:
+      typecode, dim, count = _read_header(fp.read(HEADER.size))
+      if not dim:
+         raise ValueError('read_batch needs a fixed-dimension file')
+      if typecode != VectorBatch.typecode:
+         raise ValueError(f'unsupported typecode {typecode!r}')
+      if os.fstat(fp.fileno()).st_size <= HEADER.size:
+         return VectorBatch.fromarray(array(typecode), dim)
+      mapping = memory_map(fp.fileno(), 0, access=ACCESS_READ)
+   width = array(typecode).itemsize
+   records = (len(mapping) - HEADER.size) // (dim * width)
+   if count != COUNT_UNKNOWN:
+      records = min(records, count)
+   memv = memoryview(mapping).toreadonly()[HEADER.size:HEADER.size + records * dim * width]
+   return VectorBatch.fromarray(memv.cast(typecode), dim)
+
+
+if __name__ == '__main__':
+   import tempfile
+   import time
+
+   from vector2d import Vector2D
+
+   # The 128 MB checkpoint goes with the folder at the end
+   with tempfile.TemporaryDirectory() as folder:
+      path = os.path.join(folder, 'points.vecs')
+      write_vectors(path, (Vector2D(i, -i) for i in range(5)), dim=2)
+      print(list(read_vectors(path, factory=Vector2D)))
+
+      path = os.path.join(folder, 'ragged.vecs')
+      write_vectors(path, [Vector([1]), Vector([1, 2]), Vector([1, 2, 3])])
+      print(list(read_vectors(path)), list(read_vectors(path, mmap=False)))
+
+      n, dim = 1_000_000, 16
+      path = os.path.join(folder, 'checkpoint.vecs')
+      start = time.time()
+      with open(path, 'wb') as fp, VectorWriter(fp, dim) as writer:
+         row = Vector(range(dim))
+         for _ in range(n):
+            writer.write(row)
+      end = time.time()
+      print(f"wrote {n} records of {dim}: {os.path.getsize(path) / (end - start) / 2 ** 20:6.1f} MB/s")
+      for mmap in (True, False):
+         start = time.time()
+         total = sum(1 for _ in read_vectors(path, mmap=mmap))
+         end = time.time()
+         print(f"read {total} records, mmap={mmap}: {total / (end - start):10.0f} records/s")
+      start = time.time()
+      batch = read_batch(path)
+      end = time.time()
+      print(f"read_batch: {batch} in {(end - start) * 1000:4.2f} ms")